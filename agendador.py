@@ -0,0 +1,120 @@
+import math
+import time
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from motor_deterministico import DeterministicSolver, DEFAULT_SCHEDULE
+
+
+# =========================
+# Previsão de custo e escalonamento "mais longo primeiro"
+# =========================
+#
+# O modelo é uma regressão linear de log(tempo) sobre atributos baratos: os
+# já calculados em load_puzzles e o resultado de uma passada só com o motor
+# determinístico (casas que sobram vazias). Os lotes são ordenados pelo
+# custo previsto decrescente e distribuídos dinamicamente (list scheduling
+# LPT), para que os puzzles difíceis não fiquem para o fim. A pré-passada
+# roda nos workers e o tabuleiro dela é o ponto de partida da resolução
+# (main_solver2.solve_batch), então as regras não são aplicadas duas vezes.
+
+FEATURES = (
+    'const',
+    'celulas',
+    'dicas',
+    'tamanho_medio_regiao',
+    'numero_regioes',
+    'dificuldade',
+    'vazias_apos_regras',
+)
+
+# ajustados com refit_cost_model sobre 1/8 dos puzzles de cada arquivo de ./tabuleiros
+DEFAULT_COEFS = {
+    'const': -15.26,
+    'celulas': -0.0853,
+    'dicas': 0.0378,
+    'tamanho_medio_regiao': 1.907,
+    'numero_regioes': 0.4706,
+    'dificuldade': 0.2959,
+    'vazias_apos_regras': 0.0082,
+}
+
+
+def deterministic_prepass(puzzle, schedule=DEFAULT_SCHEDULE) -> Tuple[List[Optional[int]], Dict[str, int], float]:
+    """Tabuleiro após as regras determinísticas, aplicações por regra e tempo gasto (s)."""
+    start = time.perf_counter()
+    det = DeterministicSolver(puzzle['width'], puzzle['height'], puzzle['layout'], puzzle['givens'],
+                              schedule=schedule)
+    board, _, _, counter = det.solve()
+    return board, counter, time.perf_counter() - start
+
+
+def puzzle_features(puzzle, prepass=None) -> Dict[str, float]:
+    """
+    Atributos do puzzle, incluindo uma pré-passada só com regras
+    determinísticas (`prepass`, o retorno de deterministic_prepass, quando
+    ela já foi feita).
+    """
+    width, height = puzzle['width'], puzzle['height']
+    board, _, prepass_time = prepass if prepass is not None else deterministic_prepass(puzzle)
+    return {
+        'const': 1.0,
+        'celulas': width * height,
+        'dicas': sum(1 for g in puzzle['givens'] if g is not None),
+        'tamanho_medio_regiao': puzzle['region_avg_size'],
+        'numero_regioes': puzzle['n_regions'],
+        'dificuldade': puzzle['difficulty'],
+        'vazias_apos_regras': sum(1 for v in board if v is None),
+        'tempo_pre_passada': prepass_time,
+    }
+
+
+def predict_cost(features: Dict[str, float], coefs: Optional[Dict[str, float]] = None) -> float:
+    """Tempo previsto (s); a pré-passada já é um piso para o custo."""
+    coefs = coefs or DEFAULT_COEFS
+    log_t = sum(coefs.get(name, 0.0) * features[name] for name in FEATURES)
+    return max(math.exp(log_t), features.get('tempo_pre_passada', 0.0))
+
+
+def longest_first(items: Sequence, costs: Sequence[float]) -> List:
+    return [item for _, item in sorted(zip(costs, items), key=lambda pair: -pair[0])]
+
+
+def lpt_partition(costs: Sequence[float], workers: int) -> Tuple[List[List[int]], float]:
+    """Partição LPT dos índices entre workers; devolve as filas e o makespan previsto."""
+    bins: List[List[int]] = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for idx in sorted(range(len(costs)), key=lambda i: -costs[i]):
+        w = loads.index(min(loads))
+        bins[w].append(idx)
+        loads[w] += costs[idx]
+    return bins, max(loads) if loads else 0.0
+
+
+def _solve_linear(a: List[List[float]], b: List[float]) -> List[float]:
+    # eliminação de Gauss com pivoteamento parcial (sistema pequeno)
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        piv = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[piv] = m[piv], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != col:
+                f = m[r][col] / m[col][col]
+                for c in range(col, n + 1):
+                    m[r][c] -= f * m[col][c]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) >= 1e-12 else 0.0 for i in range(n)]
+
+
+def fit_cost_model(rows: Sequence[Dict[str, float]], target: str = 'tempo', ridge: float = 1e-3) -> Dict[str, float]:
+    """
+    Reajusta os coeficientes por mínimos quadrados (com leve regularização)
+    sobre linhas que tenham os FEATURES e o tempo medido em `target`.
+    """
+    xs = [[float(row[name]) if name != 'const' else 1.0 for name in FEATURES] for row in rows]
+    ys = [math.log(max(float(row[target]), 1e-6)) for row in rows]
+    k = len(FEATURES)
+    xtx = [[sum(x[i] * x[j] for x in xs) + (ridge if i == j else 0.0) for j in range(k)] for i in range(k)]
+    xty = [sum(x[i] * y for x, y in zip(xs, ys)) for i in range(k)]
+    return dict(zip(FEATURES, _solve_linear(xtx, xty)))
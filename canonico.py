@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from puzzles import load_puzzles
+
+
+# =========================
+# Forma canônica e índice de duplicatas
+# =========================
+#
+# O mesmo puzzle chega girado, espelhado ou com outras letras de região (as
+# letras do layout são arbitrárias). A forma canônica testa as 8 simetrias
+# do tabuleiro; em cada uma as regiões são renumeradas pela ordem de
+# primeira aparição, e fica a menor das 8 chaves (dimensões, layout,
+# dicas). Os dígitos não são renomeados: dependem do tamanho da região.
+#
+# O hash da forma canônica indexa um sqlite persistente com os puzzles já
+# vistos e as respostas na orientação canônica; uma variante simétrica
+# recebe a resposta guardada passada de volta pela simetria inversa.
+#
+#   python canonico.py tabuleiros/*.txt --db indice.sqlite
+
+# simetria -> (r, c, w, h) -> (linha, coluna) no tabuleiro transformado
+SYMMETRIES = (
+    lambda r, c, w, h: (r, c),                  # identidade
+    lambda r, c, w, h: (c, h - 1 - r),          # 90°
+    lambda r, c, w, h: (h - 1 - r, w - 1 - c),  # 180°
+    lambda r, c, w, h: (w - 1 - c, r),          # 270°
+    lambda r, c, w, h: (r, w - 1 - c),          # espelho horizontal
+    lambda r, c, w, h: (h - 1 - r, c),          # espelho vertical
+    lambda r, c, w, h: (c, r),                  # transposta
+    lambda r, c, w, h: (w - 1 - c, h - 1 - r),  # antitransposta
+)
+# simetrias que trocam largura e altura
+SWAPS_DIMS = (False, True, False, True, False, False, True, True)
+
+
+@lru_cache(maxsize=None)
+def transform(width: int, height: int, sym: int) -> Tuple[int, int, Tuple[int, ...]]:
+    """
+    (largura, altura, dest) da simetria `sym`: a casa i vai para dest[i].
+    Em cache por dimensão, já que todos os puzzles de um arquivo costumam
+    ter o mesmo tamanho.
+    """
+    new_w, new_h = (height, width) if SWAPS_DIMS[sym] else (width, height)
+    f = SYMMETRIES[sym]
+    dest = []
+    for i in range(width * height):
+        r, c = divmod(i, width)
+        nr, nc = f(r, c, width, height)
+        dest.append(nr * new_w + nc)
+    return new_w, new_h, tuple(dest)
+
+
+def apply_symmetry(values, width: int, height: int, sym: int) -> List:
+    _, _, dest = transform(width, height, sym)
+    out = [None] * len(dest)
+    for i, j in enumerate(dest):
+        out[j] = values[i]
+    return out
+
+
+def undo_symmetry(values, width: int, height: int, sym: int) -> List:
+    """Inversa de apply_symmetry: `width`/`height` são as dimensões originais."""
+    _, _, dest = transform(width, height, sym)
+    return [values[j] for j in dest]
+
+
+def _key(width: int, height: int, layout, givens, sym: int) -> Tuple[int, int, str, str]:
+    new_w, new_h, dest = transform(width, height, sym)
+    n = len(dest)
+    lay = [None] * n
+    giv = [None] * n
+    for i, j in enumerate(dest):
+        lay[j] = layout[i]
+        giv[j] = givens[i]
+    ids: Dict = {}
+    lay_s = "".join(chr(0x100 + ids.setdefault(ch, len(ids))) for ch in lay)
+    giv_s = "".join(chr(0x30 + v) if v is not None else "." for v in giv)
+    return new_w, new_h, lay_s, giv_s
+
+
+def canonical(width: int, height: int, layout, givens) -> Tuple[str, int]:
+    """(hash da forma canônica, simetria que leva o puzzle até ela)."""
+    best, best_sym = None, 0
+    for sym in range(len(SYMMETRIES)):
+        key = _key(width, height, layout, givens, sym)
+        if best is None or key < best:
+            best, best_sym = key, sym
+    new_w, new_h, lay_s, giv_s = best
+    digest = hashlib.sha1(f"{new_w}x{new_h}|{lay_s}|{giv_s}".encode("utf-8")).hexdigest()
+    return digest, best_sym
+
+
+def canonical_puzzle(puzzle: Dict) -> Tuple[str, int]:
+    return canonical(puzzle["width"], puzzle["height"], puzzle["layout"], puzzle["givens"])
+
+
+class CanonicalIndex:
+    """
+    Índice persistente (sqlite) de puzzles por forma canônica, com as
+    respostas guardadas na orientação canônica.
+    """
+
+    def __init__(self, path: str, batch_size: int = 200):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: List[tuple] = []
+        self._pending_names: Dict[str, str] = {}
+        self._pending_answers: Dict[str, str] = {}
+        # o cli consulta o índice da thread que alimenta o pool
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS puzzles ("
+            " name TEXT PRIMARY KEY,"
+            " hash TEXT NOT NULL,"
+            " sym INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS puzzles_hash ON puzzles (hash)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " hash TEXT PRIMARY KEY,"
+            " answer TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, puzzle: Dict) -> Optional[str]:
+        """Registra o puzzle; devolve o nome de uma cópia já indexada (ou None)."""
+        digest, sym = canonical_puzzle(puzzle)
+        name = puzzle["name"]
+        twin = self._pending_names.get(digest)
+        if twin is None or twin == name:
+            row = self.conn.execute("SELECT name FROM puzzles WHERE hash = ? AND name != ? LIMIT 1",
+                                    (digest, name)).fetchone()
+            twin = row[0] if row else None
+        self._pending.append((name, digest, sym))
+        self._pending_names.setdefault(digest, name)
+        if puzzle.get("answer"):
+            self.store_answer(puzzle, puzzle["answer"], digest, sym)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return twin
+
+    def flush(self):
+        if not self._pending and not self._pending_answers:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO puzzles (name, hash, sym) VALUES (?, ?, ?)",
+                self._pending,
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO answers (hash, answer) VALUES (?, ?)",
+                self._pending_answers.items(),
+            )
+        self._pending.clear()
+        self._pending_names.clear()
+        self._pending_answers.clear()
+
+    def store_answer(self, puzzle: Dict, board, digest: Optional[str] = None, sym: Optional[int] = None):
+        if digest is None:
+            digest, sym = canonical_puzzle(puzzle)
+        canon = apply_symmetry(board, puzzle["width"], puzzle["height"], sym)
+        self._pending_answers.setdefault(digest, ",".join(map(str, canon)))
+        if len(self._pending_answers) >= self.batch_size:
+            self.flush()
+
+    def lookup_answer(self, puzzle: Dict, digest: Optional[str] = None,
+                      sym: Optional[int] = None) -> Optional[List[int]]:
+        """Resposta de qualquer variante simétrica já resolvida, na orientação do puzzle."""
+        if digest is None:
+            digest, sym = canonical_puzzle(puzzle)
+        self.flush()
+        row = self.conn.execute("SELECT answer FROM answers WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        canon = [int(v) for v in row[0].split(",")]
+        return undo_symmetry(canon, puzzle["width"], puzzle["height"], sym)
+
+    def duplicates(self) -> List[List[str]]:
+        """Grupos de nomes com a mesma forma canônica."""
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT hash, name FROM puzzles WHERE hash IN "
+            "(SELECT hash FROM puzzles GROUP BY hash HAVING COUNT(*) > 1) ORDER BY hash, rowid")
+        groups: Dict[str, List[str]] = {}
+        for digest, name in rows:
+            groups.setdefault(digest, []).append(name)
+        return list(groups.values())
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def index_files(paths: Iterable[str], db: str) -> Dict:
+    summary = {"total": 0, "duplicates": 0}
+    with CanonicalIndex(db) as index:
+        for path in paths:
+            for puzzle in load_puzzles(path):
+                summary["total"] += 1
+                if index.add(puzzle) is not None:
+                    summary["duplicates"] += 1
+        summary["groups"] = index.duplicates()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexa puzzles pela forma canônica e lista duplicatas")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--db", default="./results/canonico.sqlite")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+    summary = index_files(args.files, args.db)
+    for group in summary["groups"]:
+        print("\t".join(group))
+    print({"total": summary["total"], "duplicates": summary["duplicates"],
+           "groups": len(summary["groups"])}, file=sys.stderr)
@@ -0,0 +1,75 @@
+import json
+import sqlite3
+from typing import List, Dict, Iterable, Set
+
+
+# =========================
+# Armazenamento incremental de resultados do benchmark
+# =========================
+#
+# Cada resultado vira uma linha (setup, nome do puzzle, JSON) num sqlite
+# local, gravada em lotes numa única transação. Se a execução morrer, o
+# modo --resume consulta o que já está gravado e pula esses puzzles.
+
+
+def _to_builtin(value):
+    # tipos numpy/pandas -> tipos nativos para o JSON
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class ResultStore:
+    def __init__(self, path: str, batch_size: int = 50):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: List[tuple] = []
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " setup TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " PRIMARY KEY (setup, name))"
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def done(self, setup: str) -> Set[str]:
+        """Nomes dos puzzles do setup que já têm resultado gravado."""
+        rows = self.conn.execute("SELECT name FROM results WHERE setup = ?", (setup,))
+        return {name for (name,) in rows}
+
+    def add(self, setup: str, name: str, result: Dict):
+        self._pending.append((setup, name, json.dumps(dict(result), default=_to_builtin)))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (setup, name, payload) VALUES (?, ?, ?)",
+                self._pending,
+            )
+        self._pending.clear()
+
+    def records(self, setups: Iterable[str] = None) -> List[Dict]:
+        self.flush()
+        rows = self.conn.execute("SELECT setup, name, payload FROM results ORDER BY rowid")
+        wanted = set(setups) if setups is not None else None
+        return [
+            {'_setup': setup, '_name': name, **json.loads(payload)}
+            for setup, name, payload in rows
+            if wanted is None or setup in wanted
+        ]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
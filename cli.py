@@ -0,0 +1,300 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, Optional
+
+from puzzles import parse_line, parse_layout, decode_givens, parse_answer, get_region_size
+
+
+# =========================
+# Solver de linha de comando (NDJSON)
+# =========================
+#
+# Lê puzzles no formato de ./tabuleiros (uma linha TSV por puzzle) ou como
+# objetos JSON, de arquivos ou da entrada padrão, e escreve um objeto JSON
+# por linha na saída assim que cada puzzle termina. Não importa pandas nem
+# tkinter, para que a partida seja barata em pipelines.
+#
+#   python cli.py tabuleiros/SUG_8x8_v12.txt --workers 4 --unordered
+#   cat puzzles.jsonl | python cli.py --engine componentes --timeout 2
+
+ENGINES = ("regiao", "paralelo", "componentes", "det")
+# permutações testadas entre duas conferências do prazo (--engine regiao)
+TIMEOUT_STEP_NODES = 16
+
+
+class SolveTimeout(Exception):
+    pass
+
+
+def puzzle_from_json(obj: Dict) -> Dict:
+    """
+    Puzzle a partir de um objeto JSON com name, width, height, layout
+    (string do arquivo, em qualquer dos dois formatos, ou lista de ids
+    numéricos) e givens (código do arquivo ou lista com null nas casas
+    vazias); answer é opcional.
+    """
+    width, height = int(obj["width"]), int(obj["height"])
+    layout = obj["layout"]
+    layout = parse_layout(layout) if isinstance(layout, str) else tuple(int(rid) for rid in layout)
+    givens = obj["givens"]
+    if isinstance(givens, str):
+        givens = decode_givens(givens, width, height)
+    else:
+        givens = [int(v) if v else None for v in givens]
+    if len(givens) != width * height or len(layout) != width * height:
+        raise ValueError("givens/layout não batem com width x height")
+    answer = obj.get("answer")
+    if isinstance(answer, str):
+        answer = parse_answer(answer, width, height)
+    puzzle = {
+        "name": str(obj.get("name", "")), "width": width, "height": height,
+        "givens": givens, "layout": layout, "answer": answer,
+        "comment": obj.get("comment", ""), "difficulty": int(obj.get("difficulty", 0)),
+    }
+    if answer:
+        puzzle["region_avg_size"], puzzle["n_regions"] = get_region_size(answer)
+    return puzzle
+
+
+def read_puzzles(lines: Iterable[str]) -> Iterator[Dict]:
+    """Puzzles (ou registros de erro) na ordem da entrada, com o número da linha em `_line`."""
+    for lineno, line in enumerate(lines, start=1):
+        try:
+            if line.lstrip().startswith("{"):
+                puzzle = puzzle_from_json(json.loads(line))
+            else:
+                puzzle = parse_line(line)
+                if puzzle is None:
+                    continue
+        except (ValueError, KeyError, TypeError) as e:
+            yield {"_line": lineno, "_error": f"{type(e).__name__}: {e}"}
+            continue
+        puzzle["_line"] = lineno
+        yield puzzle
+
+
+def _has_answer(puzzle: Dict) -> bool:
+    # uma coluna de resposta só com zeros é preenchimento, não resposta
+    return any(puzzle.get("answer") or ())
+
+
+def _board_string(board) -> str:
+    return "".join(str(v) if v is not None else "." for v in board)
+
+
+def _on_alarm(signum, frame):
+    raise SolveTimeout()
+
+
+def _solve_engine(puzzle, engine: str, timeout: Optional[float], workers: Optional[int], options: Dict) -> Dict:
+    # import tardio: o processo principal só lê e escreve linhas
+    from solver_regiao import LevelEngineRegions
+    from motor_deterministico import DeterministicSolver
+
+    width, height, layout, givens = puzzle["width"], puzzle["height"], puzzle["layout"], puzzle["givens"]
+    if engine == "det":
+        det = DeterministicSolver(width, height, layout, givens)
+        board, _, full, counter = det.solve()
+        return {"status": "solved" if full else "stuck", "board": board,
+                "nodes_visited": 0, "backtracks": 0, "max_depth": 0,
+                "deterministic": sum(counter.values())}
+
+    if engine == "regiao":
+        deadline = time.perf_counter() + timeout if timeout else None
+        solver = LevelEngineRegions(width, height, layout, givens, **options)
+        solver.apply_rules()
+        status = "start"
+        while status not in ("solved", "unsat", "timeout"):
+            if deadline is None:
+                status, _ = solver.one_level()
+                continue
+            # com prazo, o nível anda em passos de TIMEOUT_STEP_NODES
+            # permutações e o prazo é conferido entre eles, também no meio
+            # de um retrocesso longo
+            steps = solver.level_steps(TIMEOUT_STEP_NODES)
+            status = "running"
+            while status == "running":
+                if time.perf_counter() > deadline:
+                    steps.close()
+                    status = "timeout"
+                    break
+                try:
+                    status, _ = next(steps)
+                except StopIteration as stop:
+                    status, _ = stop.value
+        return {"status": status, "board": solver.board,
+                "nodes_visited": solver.nodes_visited, "backtracks": solver.backtracks,
+                "max_depth": solver.max_depth, "restarts": solver.restarts,
+                "deterministic": sum(solver.deterministic_counter.values())}
+
+    # paralelo/componentes criam seus próprios processos: o limite de tempo
+    # vem de SIGALRM, e os dois terminam seus pools (terminate) quando a
+    # exceção atravessa a espera pelos resultados
+    from solver_paralelo import solve_parallel
+    from componentes import solve_by_components
+    alarm = timeout and hasattr(signal, "setitimer")
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if engine == "paralelo":
+            stats = solve_parallel(width, height, layout, givens, workers=workers,
+                                   ordering=options.get("ordering", "lex"))
+        else:
+            stats = solve_by_components(width, height, layout, givens, workers=workers, **options)
+    except SolveTimeout:
+        return {"status": "timeout", "board": list(givens)}
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return {"status": "solved" if stats["solved"] else "unsat", "board": stats["board"],
+            "nodes_visited": stats["nodes_visited"], "backtracks": stats["backtracks"],
+            "max_depth": stats["max_depth"],
+            "deterministic": sum(stats["deterministic_counter"].values())}
+
+
+def solve_record(puzzle: Dict, engine: str = "regiao", timeout: Optional[float] = None,
+                 workers: Optional[int] = None, options: Optional[Dict] = None) -> Dict:
+    """Resolve um puzzle e devolve o registro (só tipos JSON) escrito pela CLI."""
+    if "_error" in puzzle:
+        return {"line": puzzle["_line"], "status": "error", "error": puzzle["_error"]}
+    record = {"line": puzzle.get("_line"), "name": puzzle["name"], "engine": engine}
+    start = time.perf_counter()
+    if puzzle.get("_cached"):
+        # resposta de uma variante simétrica já resolvida (ver canonico.py)
+        board = puzzle["_cached"]
+        record.update(status="solved", solved=True, board=_board_string(board), cached=True,
+                      time=time.perf_counter() - start)
+        if _has_answer(puzzle):
+            record["matches_answer"] = list(board) == list(puzzle["answer"])
+        return record
+    try:
+        out = _solve_engine(puzzle, engine, timeout, workers, options or {})
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}",
+                      time=time.perf_counter() - start)
+        return record
+    record["time"] = time.perf_counter() - start
+    board = out.pop("board")
+    record.update(status=out.pop("status"), solved=None not in board, board=_board_string(board), **out)
+    if _has_answer(puzzle):
+        record["matches_answer"] = list(board) == list(puzzle["answer"])
+    return record
+
+
+def _solve_task(args):
+    return solve_record(*args)
+
+
+def run(puzzles: Iterable[Dict], out, engine: str = "regiao", workers: Optional[int] = None,
+        timeout: Optional[float] = None, ordered: bool = True, options: Optional[Dict] = None,
+        index=None) -> Dict:
+    """
+    Resolve e escreve um registro NDJSON por puzzle. Com regiao/det e
+    `workers` > 1 os puzzles são distribuídos num pool (na ordem da entrada
+    ou conforme terminam); paralelo/componentes usam `workers` dentro de
+    cada puzzle e rodam os puzzles em sequência. Com `index`
+    (canonico.CanonicalIndex) puzzles equivalentes a um já resolvido,
+    a menos de simetria e letras de região, saem do cache.
+    """
+    summary = {"total": 0, "solved": 0, "timeout": 0, "error": 0, "cached": 0}
+    per_puzzle_pool = engine in ("regiao", "det") and workers is not None and workers > 1
+    inner_workers = None if per_puzzle_pool else workers
+    # linha -> (puzzle, hash, simetria) dos puzzles que podem entrar no cache
+    keys: Dict[int, tuple] = {}
+    # com o pool, as tarefas são geradas na thread que alimenta os processos
+    lock = threading.Lock()
+
+    def lookup(puzzle):
+        if index is not None and "_error" not in puzzle:
+            from canonico import canonical_puzzle
+            digest, sym = canonical_puzzle(puzzle)
+            with lock:
+                cached = index.lookup_answer(puzzle, digest, sym)
+            if cached is not None:
+                puzzle["_cached"] = cached
+            else:
+                keys[puzzle["_line"]] = (puzzle, digest, sym)
+        return puzzle
+
+    tasks = ((lookup(p), engine, timeout, inner_workers, options) for p in puzzles)
+
+    def emit(record):
+        summary["total"] += 1
+        if record.get("solved"):
+            summary["solved"] += 1
+        if record.get("cached"):
+            summary["cached"] += 1
+        if record["status"] in ("timeout", "error"):
+            summary[record["status"]] += 1
+        with lock:
+            key = keys.pop(record["line"], None)
+            if key is not None and record.get("solved"):
+                puzzle, digest, sym = key
+                index.store_answer(puzzle, [int(v) for v in record["board"]], digest, sym)
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    if per_puzzle_pool:
+        with Pool(workers) as pool:
+            results = pool.imap(_solve_task, tasks) if ordered else pool.imap_unordered(_solve_task, tasks)
+            for record in results:
+                emit(record)
+    else:
+        for task in tasks:
+            emit(_solve_task(task))
+    return summary
+
+
+def _input_lines(paths):
+    if not paths or paths == ["-"]:
+        yield from sys.stdin
+        return
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            yield from f
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Resolve puzzles Suguru e escreve um JSON por linha.")
+    parser.add_argument("files", nargs="*", help="arquivos TSV/NDJSON (padrão: entrada padrão)")
+    parser.add_argument("--engine", choices=ENGINES, default="regiao")
+    parser.add_argument("--workers", type=int, default=None, help="processos (ver run)")
+    parser.add_argument("--timeout", type=float, default=None, help="segundos por puzzle")
+    parser.add_argument("--unordered", action="store_true", help="escreve conforme os puzzles terminam")
+    parser.add_argument("--ordering", default="lex", help="ordem das permutações (lex, lcv, stats)")
+    parser.add_argument("--limit", type=int, default=None, help="no máximo N puzzles")
+    parser.add_argument("--index", default=None, help="sqlite de canonico.py: reaproveita respostas de variantes simétricas")
+    args = parser.parse_args(argv)
+
+    puzzles = read_puzzles(_input_lines(args.files))
+    if args.limit is not None:
+        puzzles = (p for _, p in zip(range(args.limit), puzzles))
+    options = {"ordering": args.ordering} if args.engine != "det" else {}
+    index = None
+    if args.index:
+        from canonico import CanonicalIndex
+        index = CanonicalIndex(args.index)
+    try:
+        summary = run(puzzles, sys.stdout, engine=args.engine, workers=args.workers,
+                      timeout=args.timeout, ordered=not args.unordered, options=options, index=index)
+    except BrokenPipeError:
+        return 0
+    finally:
+        if index is not None:
+            index.close()
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import multiprocessing as mp
+from typing import List, Dict, Optional
+
+from solver_regiao import LevelEngineRegions
+
+
+# =========================
+# Decomposição do resíduo em componentes independentes
+# =========================
+#
+# Depois da propagação, duas casas vazias só interagem se estão na mesma
+# região ou são vizinhas (casas preenchidas já são constantes). Os
+# componentes conexos desse grafo são subproblemas independentes: cada um é
+# resolvido com um LevelEngineRegions restrito às suas regiões, e uma falha
+# em um componente não retrocede pelos outros.
+
+
+def find_components(engine, board) -> List[List[str]]:
+    """Agrupa as regiões abertas de `board` em componentes independentes."""
+    parent: Dict[str, str] = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for ch, cells in engine.regions.items():
+        if any(board[i] is None for i in cells):
+            parent[ch] = ch
+    for i in range(engine.N):
+        if board[i] is not None:
+            continue
+        a = engine.layout[i]
+        for n in engine.neigh[i]:
+            if board[n] is None:
+                ra, rb = find(a), find(engine.layout[n])
+                if ra != rb:
+                    parent[rb] = ra
+
+    groups: Dict[str, List[str]] = {}
+    for ch in parent:
+        groups.setdefault(find(ch), []).append(ch)
+    return list(groups.values())
+
+
+def _solve_component(args) -> Dict:
+    width, height, layout, board, labels, options = args
+    engine = LevelEngineRegions(width, height, layout, board, active_regions=labels, **options)
+    status = "start"
+    while status not in ("solved", "unsat"):
+        status, _ = engine.one_level()
+    cells = [i for ch in labels for i in engine.regions[ch]]
+    return {
+        "solved": status == "solved",
+        "values": {i: engine.board[i] for i in cells},
+        "nodes_visited": engine.nodes_visited,
+        "backtracks": engine.backtracks,
+        "max_depth": engine.max_depth,
+        "nogood_hits": engine.nogood_hits(),
+        "nogood_mem_bytes": engine.nogood_memory(),
+        "deterministic_counter": engine.deterministic_counter,
+    }
+
+
+def solve_by_components(width, height, layout, givens, workers: Optional[int] = None, **options) -> Dict:
+    """
+    Propaga, separa o resíduo em componentes e resolve cada um como
+    subproblema próprio (em paralelo se `workers` > 1). `options` vai para
+    o construtor de LevelEngineRegions.
+    """
+    engine = LevelEngineRegions(width, height, layout, givens, **options)
+    engine.apply_rules()
+    board = engine.board[:]
+
+    stats = {
+        "board": board,
+        "solved": engine.is_complete_and_valid(board),
+        "components": 0,
+        "component_sizes": [],
+        "nodes_visited": 0,
+        "backtracks": 0,
+        "max_depth": 0,
+        "nogood_hits": 0,
+        "nogood_mem_bytes": 0,
+        "deterministic_counter": dict(engine.deterministic_counter),
+    }
+    if stats["solved"]:
+        return stats
+
+    components = find_components(engine, board)
+    stats["components"] = len(components)
+    stats["component_sizes"] = [sum(1 for ch in comp for i in engine.regions[ch] if board[i] is None)
+                                for comp in components]
+
+    # maiores primeiro: um componente insatisfatível tende a aparecer cedo
+    components.sort(key=lambda comp: -sum(len(engine.regions[ch]) for ch in comp))
+    tasks = [(width, height, layout, board, comp, options) for comp in components]
+    if workers is not None and workers > 1 and len(tasks) > 1:
+        # a saída do `with` chama terminate(): num erro (p.ex. SolveTimeout
+        # do cli vindo de SIGALRM) os componentes em curso são abortados em
+        # vez de esperados
+        with mp.Pool(workers) as pool:
+            results = pool.map(_solve_component, tasks, chunksize=1)
+    else:
+        results = []
+        for task in tasks:
+            results.append(_solve_component(task))
+            if not results[-1]["solved"]:
+                break
+
+    solved = all(res["solved"] for res in results) and len(results) == len(tasks)
+    for res in results:
+        for i, v in res["values"].items():
+            board[i] = v
+        stats["nodes_visited"] += res["nodes_visited"]
+        stats["backtracks"] += res["backtracks"]
+        stats["max_depth"] = max(stats["max_depth"], res["max_depth"])
+        stats["nogood_hits"] += res["nogood_hits"]
+        stats["nogood_mem_bytes"] = max(stats["nogood_mem_bytes"], res["nogood_mem_bytes"])
+        for regra, count in res["deterministic_counter"].items():
+            stats["deterministic_counter"][regra] += count
+    stats["solved"] = solved and engine.is_complete_and_valid(board)
+    return stats
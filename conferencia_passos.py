@@ -0,0 +1,77 @@
+import argparse
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from puzzles import load_puzzles
+from solver_regiao import LevelEngineRegions
+
+
+# =========================
+# Conferência da busca em passos
+# =========================
+#
+# LevelEngineRegions.level_steps pode ser fechado no meio de um nível (GUI
+# "Parar", servidor, solve_async) e o motor retoma do mesmo ponto. Esta
+# conferência resolve cada puzzle duas vezes, com one_level e com
+# level_steps(1) fechado logo no primeiro "running" de cada chamada (a
+# interrupção mais agressiva possível), e exige os mesmos nós, retrocessos,
+# reinícios e tabuleiro final. As configurações incluem reinícios e AC-3,
+# que guardam estado entre níveis.
+#
+#   python conferencia_passos.py tabuleiros/SUG_8x8_v12.txt --limit 200
+
+CONFIGS: Dict[str, Dict] = {
+    "padrao": {},
+    "luby": {"restart_schedule": "luby", "restart_base": 2},
+    "geometric": {"restart_schedule": "geometric", "restart_base": 2},
+    "arco": {"arc_consistency": True},
+    "arco_luby": {"arc_consistency": True, "restart_schedule": "luby", "restart_base": 2},
+}
+
+
+def _solve(puzzle: Dict, interrupted: bool, options: Dict, node_cap: int) -> Tuple:
+    engine = LevelEngineRegions(puzzle["width"], puzzle["height"], puzzle["layout"], puzzle["givens"], **options)
+    _, fully = engine.apply_rules()
+    status = "solved" if fully else "start"
+    while status not in ("solved", "unsat") and engine.nodes_visited <= node_cap:
+        if not interrupted:
+            status, _ = engine.one_level()
+            continue
+        steps = engine.level_steps(1)
+        try:
+            status, _ = next(steps)
+            steps.close()
+        except StopIteration as stop:
+            status, _ = stop.value
+    return status, engine.nodes_visited, engine.backtracks, engine.restarts, engine.board
+
+
+def check(puzzles: Sequence[Dict], configs: Sequence[str] = tuple(CONFIGS),
+          node_cap: int = 5_000) -> List[Tuple[str, str, Tuple, Tuple]]:
+    """(configuração, puzzle, corrida direta, corrida interrompida) de cada divergência."""
+    mismatches = []
+    for name in configs:
+        options = CONFIGS[name]
+        for puzzle in puzzles:
+            direct = _solve(puzzle, False, options, node_cap)
+            stepped = _solve(puzzle, True, options, node_cap)
+            if direct != stepped:
+                mismatches.append((name, puzzle["name"], direct[:4], stepped[:4]))
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere que interromper level_steps não muda a busca")
+    parser.add_argument("files", nargs="+", help="arquivos de puzzles (formato de ./tabuleiros)")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--limit", type=int, default=None, help="no máximo N puzzles por arquivo")
+    parser.add_argument("--node-cap", type=int, default=5_000, help="limite de nós por corrida")
+    args = parser.parse_args()
+
+    puzzles = [p for path in args.files for p in load_puzzles(path)[:args.limit]]
+    mismatches = check(puzzles, args.configs, args.node_cap)
+    for name, puzzle, direct, stepped in mismatches[:20]:
+        print(f"{name} {puzzle}: direto (status, nós, retrocessos, reinícios)={direct} interrompido={stepped}")
+    print({"puzzles": len(puzzles), "configs": len(args.configs), "divergencias": len(mismatches)},
+          file=sys.stderr)
+    sys.exit(0 if not mismatches else 1)
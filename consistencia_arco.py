@@ -0,0 +1,107 @@
+from collections import deque
+from typing import List, Dict, Optional, Tuple
+
+
+# =========================
+# Consistência de arco entre regiões
+# =========================
+#
+# Regiões são as variáveis, as permutações válidas de cada uma são os
+# domínios e cada par de regiões vizinhas (movimento de rei) forma uma
+# restrição binária: casas adjacentes não podem repetir dígito. O AC-3 remove
+# permutações de A que não têm nenhuma permutação compatível em B.
+
+
+class RegionArcConsistency:
+    def __init__(self, engine):
+        self.engine = engine
+        self.revisions = 0
+        self.removed = 0
+
+        # para cada par (A, B): pares (posição em A, posição em B) adjacentes
+        self.pairs: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        pos = {}
+        for label, cells in engine.regions.items():
+            for p, idx in enumerate(cells):
+                pos[idx] = p
+        for label, cells in engine.regions.items():
+            for idx in cells:
+                for n in engine.neigh[idx]:
+                    other = engine.layout[n]
+                    if other != label:
+                        self.pairs.setdefault((label, other), []).append((pos[idx], pos[n]))
+        self.neighbours: Dict[str, List[str]] = {}
+        for a, b in self.pairs:
+            self.neighbours.setdefault(a, []).append(b)
+
+    # ---- domínios ----
+    def filter_domains(self, board, domains: Dict[str, List[List[int]]]) -> Dict[str, List[List[int]]]:
+        """Restringe domínios de um estado anterior ao tabuleiro `board` (mais preenchido)."""
+        engine = self.engine
+        filtered = {}
+        for label, perms in domains.items():
+            cells = engine.regions[label]
+            if all(board[i] is not None for i in cells):
+                continue
+            cell_set = set(cells)
+            # valores proibidos por casa: fixados fora da região na vizinhança
+            fixed = []
+            banned = []
+            for idx in cells:
+                fixed.append(board[idx])
+                banned.append({board[n] for n in engine.neigh[idx]
+                               if n not in cell_set and board[n] is not None})
+            filtered[label] = [
+                perm for perm in perms
+                if all((f is None or f == v) and v not in ban for v, f, ban in zip(perm, fixed, banned))
+            ]
+        return filtered
+
+    @staticmethod
+    def _index(perms: List[List[int]]) -> Tuple[int, List[Dict[int, int]]]:
+        # por posição: dígito -> bitset dos índices das permutações que o usam
+        index: List[Dict[int, int]] = [dict() for _ in range(len(perms[0]))] if perms else []
+        for k, perm in enumerate(perms):
+            bit = 1 << k
+            for p, v in enumerate(perm):
+                index[p][v] = index[p].get(v, 0) | bit
+        return (1 << len(perms)) - 1, index
+
+    def _revise(self, domains, indexes, a, b) -> bool:
+        self.revisions += 1
+        full_b, index_b = indexes[b]
+        pairs = self.pairs[(a, b)]
+        kept = []
+        for perm in domains[a]:
+            allowed = full_b
+            for pa, pb in pairs:
+                allowed &= ~index_b[pb].get(perm[pa], 0)
+                if not allowed:
+                    break
+            if allowed:
+                kept.append(perm)
+        if len(kept) == len(domains[a]):
+            return False
+        self.removed += len(domains[a]) - len(kept)
+        domains[a] = kept
+        indexes[a] = self._index(kept)
+        return True
+
+    def ac3(self, domains: Dict[str, List[List[int]]]) -> bool:
+        """Filtra `domains` no lugar; devolve False se algum domínio esvaziar."""
+        if any(not perms for perms in domains.values()):
+            return False
+        indexes = {label: self._index(perms) for label, perms in domains.items()}
+        queue = deque((a, b) for a in domains for b in self.neighbours.get(a, []) if b in domains)
+        queued = set(queue)
+        while queue:
+            a, b = queue.popleft()
+            queued.discard((a, b))
+            if self._revise(domains, indexes, a, b):
+                if not domains[a]:
+                    return False
+                for c in self.neighbours.get(a, []):
+                    if c != b and c in domains and (c, a) not in queued:
+                        queue.append((c, a))
+                        queued.add((c, a))
+        return True
@@ -0,0 +1,191 @@
+import argparse
+import os
+import re
+import sys
+import tempfile
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from motor_deterministico import DeterministicSolver, DEFAULT_SCHEDULE
+from puzzles import parse_line
+
+
+# =========================
+# Classificação de dificuldade
+# =========================
+#
+# A nota é o nível mais fraco de regras que resolve o puzzle sozinho:
+#   1  singles (atribuição, propagação, hidden single)
+#   2  + pares e apontamento entre vizinhos
+#   3  + triplas
+#   4  + quádruplas
+#   5  precisa de busca (desempate pelos nós visitados)
+# Os níveis são os prefixos de DEFAULT_SCHEDULE. Um mesmo DeterministicSolver
+# sobe de nível a partir do ponto fixo do anterior (as regras só removem
+# candidatos, então o ponto fixo não depende do caminho), em vez de refazer
+# tudo do zero a cada nível; a busca também parte desse tabuleiro.
+#
+#   python dificuldade.py tabuleiros/SUG_8x8_v12.txt --workers 4
+#   python dificuldade.py gerados.txt --rewrite -o gerados_classificados.txt
+#   python dificuldade.py gerados.txt --rewrite --in-place
+
+SEARCH_LEVEL = len(DEFAULT_SCHEDULE) + 1
+
+
+def grade(width: int, height: int, layout: str, givens: List[Optional[int]],
+          node_cap: Optional[int] = None) -> Dict:
+    """
+    Nota do puzzle: `diff` (1 a SEARCH_LEVEL), `nodes` (nós da busca, 0 se as
+    regras bastam), `steps` (aplicações de regras) e `status` (solved, unsat
+    ou cap quando a busca passa de `node_cap` nós).
+    """
+    det = DeterministicSolver(width, height, layout, givens)
+    for level in range(1, len(DEFAULT_SCHEDULE) + 1):
+        det.schedule = DEFAULT_SCHEDULE[:level]
+        board, _, full, counter = det.solve()
+        if full:
+            return {"diff": level, "nodes": 0, "steps": sum(counter.values()), "status": "solved"}
+
+    # import tardio: só os puzzles que chegam à busca precisam do motor
+    from solver_regiao import LevelEngineRegions
+    engine = LevelEngineRegions(width, height, layout, board)
+    _, fully = engine.apply_rules()
+    status = "solved" if fully else "start"
+    while status not in ("solved", "unsat"):
+        if node_cap is not None and engine.nodes_visited > node_cap:
+            status = "cap"
+            break
+        status, _ = engine.one_level()
+    steps = sum(counter.values()) + sum(engine.deterministic_counter.values())
+    return {"diff": SEARCH_LEVEL, "nodes": engine.nodes_visited, "steps": steps, "status": status}
+
+
+def grade_puzzle(puzzle: Dict, node_cap: Optional[int] = None) -> Dict:
+    return grade(puzzle["width"], puzzle["height"], puzzle["layout"], puzzle["givens"], node_cap)
+
+
+_FIELD = re.compile(r"(?<!\S)(diff|nodes)=\S*")
+
+
+def rewrite_comment(comment: str, result: Dict) -> str:
+    """Troca (ou acrescenta) diff= e nodes= no comentário, mantendo os outros campos."""
+    fields = {"diff": result["diff"], "nodes": result["nodes"]}
+    seen = set()
+
+    def replace(m):
+        # a primeira ocorrência recebe o valor novo; repetições saem
+        key = m.group(1)
+        if key in seen:
+            return ""
+        seen.add(key)
+        return f"{key}={fields[key]}"
+
+    out = _FIELD.sub(replace, comment)
+    if len(seen) < sum(1 for _ in _FIELD.finditer(comment)):
+        out = re.sub(r"  +", " ", out).rstrip()
+    extra = " ".join(f"{k}={v}" for k, v in fields.items() if k not in seen)
+    if extra:
+        out = f"{out.rstrip()} {extra}" if out.strip() else f" # {extra}"
+    return out
+
+
+def _grade_line(args):
+    line, node_cap = args
+    puzzle = parse_line(line)
+    if puzzle is None:
+        return line, None, None
+    return line, puzzle, grade_puzzle(puzzle, node_cap)
+
+
+def grade_lines(lines: Iterable[str], workers: Optional[int] = None,
+                node_cap: Optional[int] = None) -> Iterator[tuple]:
+    """(linha, puzzle, nota) na ordem da entrada; puzzle e nota são None em comentários."""
+    tasks = ((line, node_cap) for line in lines)
+    if workers is not None and workers > 1:
+        with Pool(workers) as pool:
+            yield from pool.imap(_grade_line, tasks, chunksize=8)
+    else:
+        for task in tasks:
+            yield _grade_line(task)
+
+
+def grade_file(path: str, out=sys.stdout, workers: Optional[int] = None,
+               node_cap: Optional[int] = None, rewrite: bool = False) -> Dict:
+    """
+    Classifica todos os puzzles de um arquivo. Com `rewrite`, escreve o
+    arquivo de volta em `out` com diff=/nodes= atualizados na coluna de
+    comentário; senão, uma linha por puzzle com a nota antiga e a nova.
+    """
+    summary = {"total": 0, "diff": {}, "changed": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        for line, puzzle, result in grade_lines(f, workers, node_cap):
+            if puzzle is None:
+                if rewrite:
+                    out.write(line)
+                continue
+            summary["total"] += 1
+            summary["diff"][result["diff"]] = summary["diff"].get(result["diff"], 0) + 1
+            if puzzle["difficulty"] != result["diff"]:
+                summary["changed"] += 1
+            if rewrite:
+                # mesma separação de puzzles.parse_line: com menos de 6 campos
+                # por tab a linha é separada por espaços, e volta assim
+                parts = line.rstrip("\n").split("\t")
+                sep = "\t"
+                if len(parts) < 6:
+                    parts = line.split()
+                    parts[6:] = [" ".join(parts[6:])]
+                    sep = " "
+                if len(parts) < 7:
+                    parts += [""] * (7 - len(parts))
+                parts[6] = rewrite_comment(parts[6], result)
+                if sep == " ":
+                    parts[6] = parts[6].strip()
+                out.write(sep.join(parts) + "\n")
+            else:
+                out.write(f"{puzzle['name']}\t{puzzle['difficulty']}\t{result['diff']}\t"
+                          f"{result['nodes']}\t{result['status']}\n")
+    out.flush()
+    return summary
+
+
+def rewrite_file_in_place(path: str, workers: Optional[int] = None,
+                          node_cap: Optional[int] = None) -> Dict:
+    """
+    grade_file com `rewrite` sobre o próprio arquivo: escreve num temporário
+    ao lado e só troca (os.replace) no fim, então uma falha no meio deixa o
+    original intacto.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".dificuldade-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            summary = grade_file(path, f, workers, node_cap, rewrite=True)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classifica a dificuldade de puzzles Suguru")
+    parser.add_argument("file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--node-cap", type=int, default=None, help="limite de nós da busca por puzzle")
+    parser.add_argument("--rewrite", action="store_true", help="reescreve o arquivo com diff=/nodes= novos")
+    parser.add_argument("--in-place", action="store_true", help="com --rewrite, substitui o próprio arquivo")
+    parser.add_argument("-o", "--output", default=None, help="arquivo de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    same_file = args.output is not None and os.path.exists(args.output) and os.path.samefile(args.output, args.file)
+    if args.in_place or same_file:
+        if not args.rewrite:
+            parser.error("--in-place (ou -o igual à entrada) só vale com --rewrite")
+        summary = rewrite_file_in_place(args.file, args.workers, args.node_cap)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            summary = grade_file(args.file, f, args.workers, args.node_cap, args.rewrite)
+    else:
+        summary = grade_file(args.file, workers=args.workers, node_cap=args.node_cap, rewrite=args.rewrite)
+    print(summary, file=sys.stderr)
@@ -0,0 +1,240 @@
+import argparse
+import csv
+import math
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from motor_deterministico import DeterministicSolver, i2rc, rc2i
+from solver_regiao import LevelEngineRegions
+
+
+# =========================
+# Escala: tabuleiros grandes sintéticos
+# =========================
+#
+# Mede tempo e memória dos dois motores em função do lado N (N x N casas).
+# Layouts sorteados (gerador.grow_layout) quase nunca têm solução acima de
+# uns 20x20, então os tabuleiros são montados a partir da solução: um bloco
+# T x T é preenchido casa a casa em ordem de varredura, e cada casa entra
+# numa região vizinha (ortogonal) com menos de `max_size` casas, com o dígito
+# igual ao novo tamanho dela, ou abre uma região com o dígito 1, sem repetir
+# dígito entre vizinhos de rei. A vizinhança de rei do bloco é a do toro:
+# cópias do bloco lado a lado continuam válidas, e o tabuleiro N x N é a
+# repetição do bloco (N múltiplo de T), com ids numéricos de região (formato
+# estendido de puzzles.py). As dicas são um sorteio da solução (`density`);
+# a solução não é necessariamente única e os motores param na primeira.
+#
+# Por tamanho e motor: tempo, pico de memória (tracemalloc, numa segunda
+# execução para não distorcer o tempo) com a parte da pilha de níveis e das
+# listas de candidatos, casas preenchidas e nós.
+#
+#   python escala.py --sizes 10 20 50 100 -o results/escala.csv
+
+DEFAULT_SIZES = (10, 20, 50, 100)
+ENGINES = ("det", "regiao")
+
+
+def _torus_tile(size: int, max_size: int, rng: random.Random,
+                node_cap: int = 2_000) -> Optional[Tuple[List[int], List[int]]]:
+    """Regiões e solução de um bloco size x size periódico, ou None se passar de `node_cap` nós."""
+    n = size * size
+    orth = []
+    king = []
+    for i in range(n):
+        r, c = i2rc(i, size)
+        orth.append([rc2i(r + dr, c + dc, size) for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                     if 0 <= r + dr < size and 0 <= c + dc < size])
+        king.append([rc2i((r + dr) % size, (c + dc) % size, size)
+                     for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc])
+    region = [-1] * n
+    board = [0] * n
+    cells: Dict[int, List[int]] = {}
+    next_id = 0
+
+    def options(i):
+        seen = {board[x] for x in king[i]}
+        opts = []
+        for x in orth[i]:
+            rid = region[x]
+            if rid >= 0 and rid not in opts and len(cells[rid]) < max_size and len(cells[rid]) + 1 not in seen:
+                opts.append(rid)
+        rng.shuffle(opts)
+        if 1 not in seen:
+            # testada por último (pop): abrir regiões só às vezes deixa regiões maiores
+            opts.insert(0 if rng.random() < 0.8 else len(opts), -1)
+        return opts
+
+    # busca cronológica: stack[k] são as opções restantes da casa k
+    stack = [options(0)]
+    nodes = 0
+    while stack:
+        k = len(stack) - 1
+        if not stack[-1]:
+            stack.pop()
+            if stack:
+                rid = region[k - 1]
+                cells[rid].pop()
+                if not cells[rid]:
+                    del cells[rid]
+                region[k - 1] = -1
+                board[k - 1] = 0
+            continue
+        nodes += 1
+        if nodes > node_cap:
+            return None
+        rid = stack[-1].pop()
+        if rid < 0:
+            rid = next_id
+            next_id += 1
+            cells[rid] = []
+        cells[rid].append(k)
+        region[k] = rid
+        board[k] = len(cells[rid])
+        if k + 1 == n:
+            return region, board
+        stack.append(options(k + 1))
+    return None
+
+
+def synthetic_board(n: int, tile: int = 10, max_size: int = 5, density: float = 0.4,
+                    seed: int = 0, max_tries: int = 100) -> Dict:
+    """Puzzle n x n (mesmos campos de puzzles.parse_line) repetindo um bloco periódico tile x tile."""
+    if n % tile:
+        raise ValueError(f"lado {n} não é múltiplo do bloco {tile}")
+    rng = random.Random(seed)
+    for _ in range(max_tries):
+        res = _torus_tile(tile, max_size, rng)
+        if res is not None:
+            break
+    else:
+        raise RuntimeError(f"nenhum bloco {tile}x{tile} em {max_tries} tentativas")
+    tile_region, tile_board = res
+    # ids compactos no bloco; cada cópia ganha a sua faixa de ids
+    ids: Dict[int, int] = {}
+    for rid in tile_region:
+        ids.setdefault(rid, len(ids))
+    per_tile = len(ids)
+    reps = n // tile
+    layout = []
+    answer = []
+    for r in range(n):
+        for c in range(n):
+            i = rc2i(r % tile, c % tile, tile)
+            copy = (r // tile) * reps + c // tile
+            layout.append(ids[tile_region[i]] + copy * per_tile)
+            answer.append(tile_board[i])
+    givens = [v if rng.random() < density else None for v in answer]
+    return {
+        "name": f"Escala-{n}x{n}-{seed}", "width": n, "height": n,
+        "givens": givens, "layout": tuple(layout), "answer": answer,
+        "comment": "", "n_regions": per_tile * reps * reps,
+    }
+
+
+def _run_det(puzzle: Dict, node_cap: int, memory: bool = False) -> Dict:
+    det = DeterministicSolver(puzzle["width"], puzzle["height"], puzzle["layout"], puzzle["givens"])
+    _, filled, full, _ = det.solve()
+    return {"status": "solved" if full else "stuck", "filled": filled, "nodes": 0}
+
+
+def _run_regiao(puzzle: Dict, node_cap: int, memory: bool = False) -> Dict:
+    engine = LevelEngineRegions(puzzle["width"], puzzle["height"], puzzle["layout"], puzzle["givens"])
+    _, fully = engine.apply_rules()
+    status = "solved" if fully else "start"
+    stack_peak = cand_peak = 0
+    while status not in ("solved", "unsat"):
+        if engine.nodes_visited > node_cap:
+            status = "node_cap"
+            break
+        status, _ = engine.one_level()
+        if memory:
+            stack_peak = max(stack_peak, engine.level_stack_memory())
+            cand_peak = max(cand_peak, engine.candidate_memory())
+    filled = sum(1 for v in engine.board if v is not None)
+    row = {"status": status, "filled": filled, "nodes": engine.nodes_visited}
+    if memory:
+        row["stack_kb"] = stack_peak / 1024
+        row["cands_kb"] = cand_peak / 1024
+    return row
+
+
+RUNNERS = {"det": _run_det, "regiao": _run_regiao}
+
+
+def measure(engine: str, puzzle: Dict, node_cap: int = 20_000, memory: bool = True) -> Dict:
+    """Tempo e (com `memory`) pico de memória de um motor num puzzle."""
+    run = RUNNERS[engine]
+    start = time.perf_counter()
+    row = run(puzzle, node_cap)
+    row["time"] = time.perf_counter() - start
+    if memory:
+        tracemalloc.start()
+        try:
+            traced = run(puzzle, node_cap, memory=True)
+            row["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+            # pilha de níveis e candidatos (só o LevelEngineRegions), amostrados a cada nível
+            row["stack_kb"] = traced.get("stack_kb", 0.0)
+            row["cands_kb"] = traced.get("cands_kb", 0.0)
+        finally:
+            tracemalloc.stop()
+    return row
+
+
+def growth(rows: Sequence[Dict], field: str = "time") -> Optional[float]:
+    """Expoente de `field` contra o número de casas (reta log-log entre o menor e o maior tabuleiro)."""
+    pts = [(row["cells"], row[field]) for row in rows if row.get(field)]
+    if len(pts) < 2:
+        return None
+    (x0, y0), (x1, y1) = min(pts), max(pts)
+    if x1 == x0:
+        return None
+    return math.log(y1 / y0) / math.log(x1 / x0)
+
+
+def scaling(sizes: Sequence[int] = DEFAULT_SIZES, engines: Sequence[str] = ENGINES, tile: int = 10,
+            density: float = 0.4, seed: int = 0, node_cap: int = 20_000, memory: bool = True) -> List[Dict]:
+    rows = []
+    for n in sizes:
+        puzzle = synthetic_board(n, tile=tile, density=density, seed=seed)
+        for engine in engines:
+            row = {"n": n, "cells": n * n, "regions": puzzle["n_regions"], "engine": engine}
+            row.update(measure(engine, puzzle, node_cap, memory))
+            rows.append(row)
+            peak = (f"{row['peak_kb']:10.0f} KiB (pilha {row['stack_kb']:.0f}, candidatos {row['cands_kb']:.0f})"
+                    if memory else "")
+            print(f"{n:>4}x{n:<4} {engine:<7} {row['time']:9.3f} s {peak}  "
+                  f"{row['status']:<8} casas={row['filled']}/{n * n} nós={row['nodes']}", flush=True)
+    for engine in engines:
+        sub = [row for row in rows if row["engine"] == engine]
+        fields = ("time", "peak_kb") if memory else ("time",)
+        exps = {field: growth(sub, field) for field in fields}
+        if all(k is None for k in exps.values()):
+            continue
+        print(f"{engine:<7} crescimento ~ casas^k: "
+              + "  ".join(f"{field} k={k:.2f}" for field, k in exps.items() if k is not None))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo e memória dos motores em tabuleiros N x N sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--tile", type=int, default=10, help="lado do bloco periódico (divide os tamanhos)")
+    parser.add_argument("--density", type=float, default=0.4, help="fração de casas dadas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--node-cap", type=int, default=20_000, help="limite de nós do LevelEngineRegions")
+    parser.add_argument("--no-memory", action="store_true", help="não mede memória (uma execução só)")
+    parser.add_argument("-o", "--output", default=None, help="CSV com uma linha por tamanho e motor")
+    args = parser.parse_args()
+
+    rows = scaling(args.sizes, args.engines, args.tile, args.density, args.seed,
+                   args.node_cap, not args.no_memory)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    sys.exit(0 if all(row["status"] == "solved" for row in rows if row["engine"] == "regiao") else 1)
@@ -0,0 +1,57 @@
+from enum import IntEnum
+from typing import Dict, Iterable, List, Tuple
+
+
+# =========================
+# Eventos compactos do motor de níveis
+# =========================
+#
+# Os eventos do LevelEngineRegions (info["events"] de one_level/level_steps)
+# são tuplas curtas (código, campos...) em vez de dicts: num nível com muitas
+# permutações contraditórias, um dict por irmão que falhou era boa parte das
+# alocações. A GUI, e quem precisar do formato antigo, converte com
+# event_to_dict / events_to_dicts ({"type": "region_mrv", "region": ...}).
+
+
+class Ev(IntEnum):
+    SOLVED = 0
+    UNSAT = 1
+    UNSAT_STATE = 2
+    RESTART = 3
+    NO_REGION_CANDIDATE = 4
+    REGION_MRV = 5
+    DET_FILLS = 6
+    ROLLBACK_REGION = 7
+    CONTRADICTION_REGION = 8
+    COMMIT_REGION = 9
+
+
+# campos de cada evento, na ordem da tupla (depois do código)
+EVENT_FIELDS: Dict[Ev, Tuple[str, ...]] = {
+    Ev.SOLVED: (),
+    Ev.UNSAT: (),
+    Ev.UNSAT_STATE: (),
+    Ev.RESTART: ("count", "reverted"),
+    Ev.NO_REGION_CANDIDATE: ("regions",),
+    Ev.REGION_MRV: ("region", "candidate_count", "cells"),
+    Ev.DET_FILLS: ("count", "indices"),
+    Ev.ROLLBACK_REGION: ("region", "reverted"),
+    Ev.CONTRADICTION_REGION: ("region", "assignment", "reason"),
+    Ev.COMMIT_REGION: ("region", "assignment"),
+}
+
+SOLVED_EVENT = (Ev.SOLVED,)
+UNSAT_EVENT = (Ev.UNSAT,)
+UNSAT_STATE_EVENT = (Ev.UNSAT_STATE,)
+
+
+def event_to_dict(event: Tuple) -> Dict:
+    """Evento no formato de dict ({"type": nome, campo: valor, ...})."""
+    code = Ev(event[0])
+    out = {"type": code.name.lower()}
+    out.update(zip(EVENT_FIELDS[code], event[1:]))
+    return out
+
+
+def events_to_dicts(events: Iterable[Tuple]) -> List[Dict]:
+    return [event_to_dict(event) for event in events]
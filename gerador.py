@@ -0,0 +1,263 @@
+import argparse
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple, Union
+
+from dificuldade import grade
+from motor_deterministico import DeterministicSolver
+from puzzles import encode_layout
+from solver_regiao import LevelEngineRegions
+
+
+# =========================
+# Gerador de puzzles
+# =========================
+#
+# 1. layout: regiões crescidas aleatoriamente (vizinhança ortogonal) até
+#    `max_size` casas; sobras de 1 ou 2 casas são fundidas numa vizinha;
+# 2. solução: o LevelEngineRegions resolve o tabuleiro vazio com sementes e
+#    reinícios (layouts sem solução ou caros demais são descartados);
+# 3. remoção de dicas em ordem aleatória. Se o puzzle P (com a dica i) tem
+#    solução única S, P sem a dica i continua único sse não existe solução
+#    com a casa i diferente de S[i]: basta testar cada outro candidato de i,
+#    e não contar soluções do zero. Os testes partem do ponto fixo das regras
+#    para P sem a dica; se as regras já fixam a casa i, é único sem busca.
+#    Todas as buscas de um layout usam o mesmo motor
+#    (LevelEngineRegions.reset) e acumulam a tabela de nogoods, que vale
+#    para qualquer conjunto de dicas no mesmo layout.
+#
+# Saída no formato de ./tabuleiros, com o comentário "# diff=... givens=..."
+# (nota de dificuldade.py).
+#
+#   python gerador.py -w 15 -ht 10 -ms 6 -n 1000 --workers 8 -o novos.txt
+
+LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def _orth(i: int, width: int, height: int) -> List[int]:
+    r, c = divmod(i, width)
+    out = []
+    if r > 0: out.append(i - width)
+    if r < height - 1: out.append(i + width)
+    if c > 0: out.append(i - 1)
+    if c < width - 1: out.append(i + 1)
+    return out
+
+
+def grow_layout(width: int, height: int, max_size: int, rng: random.Random) -> Union[str, Tuple[int, ...]]:
+    """
+    Layout aleatório com regiões conexas de até `max_size` casas: string de
+    rótulos, ou tupla de ids numéricos se passar de 52 regiões (formato
+    estendido de puzzles.py).
+    """
+    n = width * height
+    region = [-1] * n
+    sizes: List[int] = []
+    # sementes na ordem de varredura: deixa menos bolsões isolados que sementes
+    # sorteadas, e layouts com muitas regiões pequenas quase nunca têm solução
+    for start in range(n):
+        if region[start] >= 0:
+            continue
+        rid = len(sizes)
+        members = [start]
+        region[start] = rid
+        while len(members) < max_size:
+            # casas com mais vizinhos na região aparecem mais vezes: regiões compactas
+            options = [nb for m in members for nb in _orth(m, width, height) if region[nb] < 0]
+            if not options:
+                break
+            cell = rng.choice(options)
+            region[cell] = rid
+            members.append(cell)
+        sizes.append(len(members))
+
+    # regiões de 1 e 2 casas entram numa vizinha que ainda tenha espaço
+    for small in (1, 2):
+        for rid in range(len(sizes)):
+            if sizes[rid] != small:
+                continue
+            cells = [i for i in range(n) if region[i] == rid]
+            hosts = sorted({region[nb] for i in cells for nb in _orth(i, width, height)
+                            if region[nb] != rid and sizes[region[nb]] + small <= max_size})
+            if hosts:
+                host = rng.choice(hosts)
+                for i in cells:
+                    region[i] = host
+                sizes[host] += small
+                sizes[rid] = 0
+
+    # rótulos na ordem da primeira aparição, como nos arquivos originais
+    labels: Dict[int, int] = {}
+    for rid in region:
+        if rid not in labels:
+            labels[rid] = len(labels)
+    if len(labels) > len(LABELS):
+        return tuple(labels[rid] for rid in region)
+    return "".join(LABELS[labels[rid]] for rid in region)
+
+
+def fill_solution(width: int, height: int, layout: str, seed: int,
+                  node_cap: int = 20_000) -> Optional[List[int]]:
+    """Uma solução aleatória do tabuleiro vazio, ou None (sem solução / limite de nós)."""
+    engine = LevelEngineRegions(width, height, layout, [None] * (width * height),
+                                seed=seed, restart_schedule="luby")
+    engine.apply_rules()
+    status = "start"
+    while status not in ("solved", "unsat"):
+        if engine.nodes_visited > node_cap:
+            return None
+        status, _ = engine.one_level()
+    return engine.board[:] if status == "solved" else None
+
+
+class UniquenessChecker:
+    """Testa remoções de dicas num layout, reaproveitando motor e nogoods."""
+
+    def __init__(self, width: int, height: int, layout: str, solution: List[int], node_cap: int = 5_000):
+        self.width, self.height, self.layout = width, height, layout
+        self.solution = solution
+        self.node_cap = node_cap
+        self.engine = LevelEngineRegions(width, height, layout, solution)
+        self.searches = 0
+        self.nodes = 0
+
+    def _satisfiable(self, givens) -> Optional[bool]:
+        engine = self.engine
+        engine.reset(givens, keep_nogoods=True)
+        self.searches += 1
+        _, fully = engine.apply_rules()
+        status = "solved" if fully else "start"
+        while status not in ("solved", "unsat"):
+            if engine.nodes_visited > self.node_cap:
+                self.nodes += engine.nodes_visited
+                return None
+            status, _ = engine.one_level()
+        self.nodes += engine.nodes_visited
+        return status == "solved"
+
+    def still_unique(self, givens: List[Optional[int]], cell: int) -> bool:
+        """`givens` (único) continua único sem a dica de `cell`? Na dúvida, não."""
+        trial = givens[:]
+        trial[cell] = None
+        det = DeterministicSolver(self.width, self.height, self.layout, trial)
+        board, _, full, _ = det.solve()
+        if full or len(det.cands[cell]) == 1:
+            # as regras já fixam a casa no valor da solução
+            return True
+        # as deduções de P sem a dica valem em qualquer solução dele: cada
+        # teste parte do ponto fixo, só com os dígitos que sobraram na casa
+        for v in sorted(det.cands[cell]):
+            if v == self.solution[cell]:
+                continue
+            start = board[:]
+            start[cell] = v
+            sat = self._satisfiable(start)
+            if sat is None or sat:
+                return False
+        return True
+
+
+def encode_givens(givens: List[Optional[int]]) -> str:
+    # casas vazias em sequência viram uma letra (a = 1, ..., z = 26)
+    out = []
+    blanks = 0
+    for v in givens + [0]:
+        if v is None:
+            blanks += 1
+            continue
+        while blanks:
+            run = min(blanks, 26)
+            out.append(chr(ord('a') + run - 1))
+            blanks -= run
+        if v:
+            out.append(str(v))
+    return "".join(out)
+
+
+def generate_one(width: int, height: int, max_size: int, seed: int,
+                 max_layouts: int = 200) -> Optional[Tuple[str, Dict]]:
+    """Gera um puzzle de solução única; devolve a linha TSV e estatísticas."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for attempt in range(max_layouts):
+        layout = grow_layout(width, height, max_size, rng)
+        solution = fill_solution(width, height, layout, rng.randrange(1 << 30))
+        if solution is not None:
+            break
+    else:
+        return None
+
+    checker = UniquenessChecker(width, height, layout, solution)
+    givens: List[Optional[int]] = solution[:]
+    order = list(range(width * height))
+    rng.shuffle(order)
+    for cell in order:
+        if checker.still_unique(givens, cell):
+            givens[cell] = None
+
+    n_givens = sum(1 for v in givens if v is not None)
+    result = grade(width, height, layout, givens)
+    diff = result["diff"]
+    syms = max(solution)
+    comment = f" # diff={diff} nodes={result['nodes']} givens={n_givens} syms={syms} seed={seed}"
+    line = "\t".join([f"Gen-{seed}", str(width), str(height), encode_givens(givens), encode_layout(layout),
+                      "".join(map(str, solution)), comment])
+    stats = {"layouts": attempt + 1, "searches": checker.searches, "nodes": checker.nodes,
+             "diff": diff, "givens": n_givens, "time": time.perf_counter() - start}
+    return line, stats
+
+
+def _generate_task(args):
+    return generate_one(*args)
+
+
+def generate(width: int, height: int, max_size: int, count: int, seed: int = 0,
+             workers: Optional[int] = None, out=sys.stdout) -> Dict:
+    """Gera `count` puzzles (sementes seed, seed+1, ...) em `workers` processos, escrevendo conforme ficam prontos."""
+    tasks = [(width, height, max_size, seed + k) for k in range(count)]
+    summary = {"generated": 0, "failed": 0, "diff": {}}
+    start = time.perf_counter()
+    out.write(f"# created by gerador.py -w {width} -ht {height} -ms {max_size} -n {count} -seed {seed}\n")
+
+    def emit(res):
+        if res is None:
+            summary["failed"] += 1
+            return
+        line, stats = res
+        out.write(line + "\n")
+        summary["generated"] += 1
+        summary["diff"][stats["diff"]] = summary["diff"].get(stats["diff"], 0) + 1
+
+    if workers is not None and workers > 1:
+        with Pool(workers) as pool:
+            for res in pool.imap_unordered(_generate_task, tasks, chunksize=4):
+                emit(res)
+    else:
+        for task in tasks:
+            emit(_generate_task(task))
+    out.flush()
+    elapsed = time.perf_counter() - start
+    summary["time"] = elapsed
+    summary["per_hour"] = summary["generated"] / elapsed * 3600 if elapsed > 0 else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera puzzles Suguru de solução única")
+    parser.add_argument("-w", "--width", type=int, default=8)
+    parser.add_argument("-ht", "--height", type=int, default=8)
+    parser.add_argument("-ms", "--max-size", type=int, default=5, help="tamanho máximo de região")
+    parser.add_argument("-n", "--count", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default=None, help="arquivo de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            summary = generate(args.width, args.height, args.max_size, args.count, args.seed, args.workers, f)
+    else:
+        summary = generate(args.width, args.height, args.max_size, args.count, args.seed, args.workers)
+    print(summary, file=sys.stderr)
@@ -3,7 +3,7 @@ import re
 
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import itertools
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
@@ -11,6 +11,7 @@ from typing import List, Dict, Optional, Tuple
 from puzzles import *
 from motor_deterministico import *
 from solver_regiao import *
+from eventos import Ev, events_to_dicts
 
 
 DEFAULT_FILES = {
@@ -21,6 +22,9 @@ DEFAULT_FILES = {
     "15x10 n=6":"./tabuleiros/SUG_15x10n6_v12.txt",
 }
 
+# permutações testadas por passo do auto-run
+AUTORUN_STEP_NODES = 16
+
 class SuguruLevelsGUI:
     def __init__(self, root, initial_puzzles, initial_size_label="8x8", initial_path=None):
         self.root = root
@@ -40,6 +44,8 @@ class SuguruLevelsGUI:
         self.level_badges: Dict[int, int] = {}
         self.autorun_flag = False
         self.delay_ms = 50
+        # nível em andamento no auto-run (gerador de LevelEngineRegions.level_steps)
+        self.level_steps = None
 
         # UI raiz
         main = ttk.Frame(root, padding=8)
@@ -112,6 +118,8 @@ class SuguruLevelsGUI:
         self.canvas.pack(pady=4)
         self.margin = 20
         self.cell_size = 60  # recalculado a cada puzzle
+        # clique numa casa edita a dica dela (re-resolução incremental)
+        self.canvas.bind("<Button-1>", self.on_cell_click)
 
         controls = ttk.Frame(right)
         controls.pack(fill="x", pady=6)
@@ -424,6 +432,7 @@ class SuguruLevelsGUI:
         self._build_regions()
         self.level_badges.clear()
         self.autorun_flag = False
+        self.level_steps = None
         self.draw_board()
         self.clear_history()
         self.log(f"Carregado: {self.current['name']}", "mrv")
@@ -436,11 +445,67 @@ class SuguruLevelsGUI:
         self.givens_mask = [v is not None for v in self.board]
         self.level_badges.clear()
         self.autorun_flag = False
+        self.level_steps = None
         self.draw_board()
         self.clear_history()
         self.log("Tabuleiro resetado.", "mrv")
         self.update_status("Tabuleiro resetado.")
 
+    def on_cell_click(self, event):
+        if not self.current or self.autorun_flag:
+            return
+        s = self.cell_size; m = self.margin
+        r = int((event.y - m) // s); c = int((event.x - m) // s)
+        if not (0 <= r < self.height and 0 <= c < self.width):
+            return
+        idx = rc2i(r, c, self.width)
+        size = len(self.regions[self.layout[idx]])
+        old = self.current["givens"][idx]
+        text = simpledialog.askstring(
+            "Editar dica", f"Dica da casa ({r},{c}), 1..{size} (vazio remove):",
+            initialvalue="" if old is None else str(old), parent=self.root)
+        if text is None:
+            return
+        text = text.strip()
+        if text and not (text.isdigit() and 1 <= int(text) <= size):
+            messagebox.showerror("Editar dica", f"Valor inválido: {text}")
+            return
+        val = int(text) if text else None
+        if val == old:
+            return
+        shown = f"Dica ({r},{c}) = {val}" if val is not None else f"Dica ({r},{c}) removida"
+        givens = self.current["givens"][:]
+        givens[idx] = val
+        # cópia: o puzzle da lista continua com as dicas do arquivo
+        self.current = dict(self.current, givens=givens)
+        self.level_badges.clear()
+        self.level_steps = None
+
+        if self.engine.is_target_solved(self.board):
+            # reaproveita a solução atual: só as regiões afetadas são refeitas
+            added = {idx: val} if val is not None else {}
+            removed = [idx] if val is None else []
+            status, info = self.engine.edit_givens(added, removed)
+            self.board = self.engine.board
+            self.givens_mask = self.engine.givens_mask[:]
+            self.draw_board()
+            if status == "solved":
+                how = ("solução mantida" if info["reused"]
+                       else f"{len(info['regions'])} regiões refeitas, {info['nodes_visited']} nós")
+                self.log(f"{shown}: {how}", "done")
+                self.update_status("Resolvido após edição.")
+            else:
+                self.log(f"{shown}: sem solução", "contradiction")
+                self.update_status("Sem solução após edição.")
+            return
+
+        self.engine.reset(givens, keep_nogoods=True)
+        self.board = self.engine.board
+        self.givens_mask = [v is not None for v in self.board]
+        self.draw_board()
+        self.log(shown, "mrv")
+        self.update_status("Dica editada.")
+
     def update_status(self, extra=""):
         det_now = self.engine.det_count() if self.engine else 0
         guess_now = self.engine.guess_count() if self.engine else 0
@@ -518,8 +583,8 @@ class SuguruLevelsGUI:
         else:
             self.update_status("Regras aplicadas (manual).")
 
-    def process_events_log(self, events: List[dict]):
-        for ev in events or []:
+    def process_events_log(self, events: List[tuple]):
+        for ev in events_to_dicts(events or []):
             t = ev.get("type")
             if t == "region_mrv":
                 region = ev.get("region")
@@ -539,6 +604,11 @@ class SuguruLevelsGUI:
                 if region and region in self.regions:
                     for idx in self.regions[region]:
                         self.set_badge_level(idx, None)
+            elif t == "restart":
+                self.log(f"Reinício #{ev.get('count')}: volta à raiz", "rollback")
+                self.level_badges.clear()
+                self.redraw_badges()
+                self.apply_rollback_visual(ev.get("reverted", []))
             elif t == "det_fills":
                 cnt = ev.get("count",0)
                 self.log(f"Deduções determinísticas: +{cnt}", "det")
@@ -558,6 +628,9 @@ class SuguruLevelsGUI:
 
     def run_one_level(self):
         if not self.engine: return
+        if self.level_steps is not None:
+            self.level_steps.close()
+            self.level_steps = None
 
         status, info = self.engine.one_level()
         self.board = self.engine.board
@@ -605,13 +678,19 @@ class SuguruLevelsGUI:
 
     def autorun_stop(self):
         self.autorun_flag = False
+        if self.level_steps is not None:
+            # o motor fica retomável no ponto em que o nível parou
+            self.level_steps.close()
+            self.level_steps = None
         self.update_status("Auto-run parado.")
 
     def _autorun_tick(self):
         if not self.autorun_flag: return
 
-        # (0) REGRAS DETERMINÍSTICAS PRIMEIRO
-        new_idxs, fully = self.engine.apply_rules()
+        # (0) REGRAS DETERMINÍSTICAS PRIMEIRO (não no meio de um nível, nem
+        # de um nível parado pelo "Parar", que o motor retoma de onde estava)
+        mid_level = self.level_steps is not None or self.engine.level_in_progress()
+        new_idxs, fully = ([], False) if mid_level else self.engine.apply_rules()
         self.board = self.engine.board
         if new_idxs:
             self.animate_new_dets(new_idxs)
@@ -624,11 +703,25 @@ class SuguruLevelsGUI:
             self.root.after(self.delay_ms, self._autorun_tick)
             return
 
-        # (1) TRAVOU -> 1 nível (BT + Regras)
-        status, info = self.engine.one_level()
+        # (1) TRAVOU -> 1 nível (BT + Regras), em passos de AUTORUN_STEP_NODES
+        # permutações para a interface não congelar em níveis longos
+        if self.level_steps is None:
+            self.level_steps = self.engine.level_steps(AUTORUN_STEP_NODES)
+        try:
+            status, info = next(self.level_steps)
+        except StopIteration as stop:
+            status, info = stop.value
+            self.level_steps = None
         self.board = self.engine.board
 
         self.process_events_log(info.get("events", []))
+        if status == "running":
+            for ev in info.get("events", []):
+                if ev[0] == Ev.ROLLBACK_REGION:
+                    self.apply_rollback_visual(ev[2])
+            self.update_status(f"Auto: nível {info['level'] + 1}, {info['nodes_visited']} nós...")
+            self.root.after(1, self._autorun_tick)
+            return
 
         reverted = info.get("reverted", [])
         if reverted:
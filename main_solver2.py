@@ -1,9 +1,17 @@
+import os
 import time
+import tracemalloc
+import argparse
 from puzzles import load_puzzles
 from solver_regiao import LevelEngineRegions
-from motor_deterministico import DeterministicSolver
+from motor_deterministico import DeterministicSolver, build_schedule
+from solver_paralelo import solve_parallel
+from componentes import solve_by_components
+from checkpoint import ResultStore
+from agendador import deterministic_prepass, puzzle_features, predict_cost, longest_first, lpt_partition, fit_cost_model
+from ordenacao import ORDERINGS
 
-import pandas as pd
+from multiprocessing import Pool
 
 DEFAULT_FILES = {
     "6x6":      "./tabuleiros/SUG_6x6_v12.txt",
@@ -19,10 +27,24 @@ def is_solved(board):
     return None not in board
 
 
-def solve_suguru_textmode(puzzle, setup='8x8'):
+def solve_suguru_textmode(puzzle, setup='8x8', workers=None, ordering='lex', memory=False, prepass=None,
+                          **engine_options):
     """
     Resolve um puzzle Suguru em modo texto, sem interface gráfica.
     Usa o motor determinístico e, opcionalmente, o solver com backtracking (LevelEngine).
+    Com `workers` > 1 a busca é dividida entre processos (solver_paralelo).
+    `ordering` seleciona a heurística de ordem das permutações (ordenacao.py).
+    `engine_options` vai para o LevelEngineRegions (alldiff, subset_rules,
+    arc_consistency, seed, restart_schedule, ...).
+
+    Com `memory` a resolução roda sob tracemalloc (o tempo medido fica
+    maior) e a linha ganha o pico de memória alocada e os picos da pilha de
+    níveis e das listas de candidatos, amostrados a cada nível. Só no modo
+    de um processo.
+
+    `prepass` é o retorno de agendador.deterministic_prepass (com o mesmo
+    escalonamento de regras do motor) já calculado para o puzzle: a busca
+    parte desse tabuleiro e o tempo da pré-passada entra no tempo medido.
     """
 
 
@@ -30,33 +52,104 @@ def solve_suguru_textmode(puzzle, setup='8x8'):
     layout = puzzle['layout']
     givens = puzzle['givens']
 
-    # inicia o motor de níveis (backtracking controlado)
-    engine = LevelEngineRegions(width, height, layout, givens)
+    if workers is not None and workers > 1:
+        return solve_suguru_parallel_textmode(puzzle, setup=setup, workers=workers, ordering=ordering,
+                                              **engine_options)
 
-    start_time = time.perf_counter()
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if memory:
+        tracemalloc.reset_peak()
+
+    # desliga o tracing iniciado aqui mesmo se o motor falhar; senão o resto
+    # do lote rodaria (e seria medido) sob tracemalloc
+    try:
+        # inicia o motor de níveis (backtracking controlado)
+        engine = LevelEngineRegions(width, height, layout, givens, ordering=ordering, **engine_options)
 
-    det = DeterministicSolver(width, height, engine.layout, engine.board)
-    det.solve()
-    engine.board = det.board[:]  # atualiza estado
+        start_time = time.perf_counter()
 
-    solved = is_solved(engine.board)
+        if prepass is not None:
+            board, det_counter, prepass_time = prepass
+            start_time -= prepass_time
+        else:
+            det = DeterministicSolver(width, height, engine.layout, engine.board, schedule=engine.det_schedule)
+            board, _, _, det_counter = det.solve()
+        engine.board = board[:]  # atualiza estado
 
-    while not solved:
-        engine.one_level()
         solved = is_solved(engine.board)
+        stack_peak = cand_peak = 0
+
+        while not solved:
+            engine.one_level()
+            if memory:
+                stack_peak = max(stack_peak, engine.level_stack_memory())
+                cand_peak = max(cand_peak, engine.candidate_memory())
+            solved = is_solved(engine.board)
+
+        elapsed = time.perf_counter() - start_time
+        memory_cols = {}
+        if memory:
+            memory_cols = {
+                'memoria_pico_bytes': tracemalloc.get_traced_memory()[1],
+                'pilha_niveis_bytes': stack_peak,
+                'candidatos_bytes': cand_peak,
+            }
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    for k in det_counter:
+        engine.deterministic_counter[k] += det_counter[k]
 
+    return _result_row(puzzle, setup, ordering, elapsed, {
+        'nodes_visited': engine.nodes_visited,
+        'max_depth': engine.max_depth,
+        'backtracks': engine.backtracks,
+        'restarts': engine.restarts,
+        'nogood_hits': engine.nogood_hits(),
+        'nogood_mem_bytes': engine.nogood_memory(),
+        'solved': solved,
+        'deterministic_counter': engine.deterministic_counter,
+        'board': engine.board[:],
+        'memory': memory_cols,
+    })
+
+
+def solve_suguru_parallel_textmode(puzzle, setup='8x8', workers=None, split_depth=1, ordering='lex',
+                                   **engine_options):
+    width, height = puzzle['width'], puzzle['height']
+    givens = puzzle['givens']
+
+    start_time = time.perf_counter()
+    stats = solve_parallel(width, height, puzzle['layout'], givens,
+                           workers=workers, split_depth=split_depth, ordering=ordering, **engine_options)
     elapsed = time.perf_counter() - start_time
 
-    n_given = len([g for g in givens if g is not None])
+    return _result_row(puzzle, setup, ordering, elapsed, stats)
+
+
+def solve_suguru_components_textmode(puzzle, setup='8x8', workers=None, ordering='lex'):
+    start_time = time.perf_counter()
+    stats = solve_by_components(puzzle['width'], puzzle['height'], puzzle['layout'], puzzle['givens'],
+                                workers=workers, ordering=ordering)
+    elapsed = time.perf_counter() - start_time
+
+    res = _result_row(puzzle, setup, ordering, elapsed, stats)
+    res['componentes'] = stats['components']
+    return res
+
+
+def _result_row(puzzle, setup, ordering, elapsed, stats):
+    # linha do relatório como dict simples; pandas só entra ao montar as tabelas
+    n_given = len([g for g in puzzle['givens'] if g is not None])
     try:
         size = int(setup.split('x')[0]) * int(setup.split('x')[1])
     except:
         size = 150
 
-    for k in det.counter:
-        engine.deterministic_counter[k] += det.counter[k]
-
-    return pd.Series({
+    return {
         'id': puzzle['name'],
         'tabuleiro': setup,
         'size': size,
@@ -64,40 +157,216 @@ def solve_suguru_textmode(puzzle, setup='8x8'):
         'tamanho_medio_regiao':puzzle['region_avg_size'],
         'dificuldade': puzzle['difficulty'],
         'dicas':n_given,
+        'ordenacao': ordering,
 
         'tempo': elapsed,
-        'nos_visitados': engine.nodes_visited,
-        'profundidade_maxima': engine.max_depth,
-        'total_podas': sum(engine.deterministic_counter.values()),
-        'backtracks': engine.backtracks,
-        'resolvido': solved,
-        **engine.deterministic_counter
-    })
+        'nos_visitados': stats['nodes_visited'],
+        **stats.get('memory', {}),
+        'profundidade_maxima': stats['max_depth'],
+        'total_podas': sum(stats['deterministic_counter'].values()),
+        'backtracks': stats['backtracks'],
+        'reinicios': stats.get('restarts', 0),
+        'nogood_hits': stats['nogood_hits'],
+        'nogood_mem_bytes': stats['nogood_mem_bytes'],
+        'resolvido': stats['solved'],
+        **stats['deterministic_counter'],
+        # só até a verificação em lote (_verify_results), não vai para o relatório
+        '_board': stats['board'],
+    }
 
 
-def solve_all_sugurus(limit=None, backtracking_method='regiao'):
-    results = None
-    for setup in DEFAULT_FILES:
-        i = 0
-        filepath = DEFAULT_FILES[setup]
-        puzzles = load_puzzles(filepath)  # lê o arquivo padrão de puzzles
-        setup_finalizado = False
-        print(setup)
-        while not setup_finalizado:
-            print(f'{setup} - {i}')
-            try:
-                puzzle = puzzles[i]
-                res = solve_suguru_textmode(puzzle, setup=setup)
-                if results is None:
-                    results = pd.DataFrame(columns=res.index)
-                results.loc[f'{setup}_{puzzle["name"]}'] = res
-                i+=1
-                if limit is not None and i == limit:
-                    setup_finalizado = True 
-            except IndexError as e:
-               setup_finalizado = True
+def _verify_results(rows, puzzles_by_name):
+    """
+    Portão de correção barato e sempre ligado: confere os tabuleiros das
+    linhas de uma vez (NumPy, ver verificacao.py) contra as regras e a
+    resposta do arquivo e troca o tabuleiro pelas colunas 'valido' e
+    'confere_resposta'. Devolve quantas linhas falharam.
+    """
+    from verificacao import verify_boards
+    if not rows:
+        return 0
+    checks = verify_boards([puzzles_by_name[row['id']] for row in rows], [row.pop('_board') for row in rows])
+    failed = 0
+    for row, check in zip(rows, checks):
+        row['valido'] = check['valid']
+        row['confere_resposta'] = check['matches_answer']
+        if not check['valid'] or check['matches_answer'] is False:
+            failed += 1
+            print(f"ATENÇÃO: {row['tabuleiro']} {row['id']} resolvido={row['resolvido']} "
+                  f"valido={check['valid']} confere_resposta={check['matches_answer']}")
+    return failed
+
+
+def solve_all_sugurus(limit=None, backtracking_method='regiao', workers=None, ordering='lex',
+                      batch_workers=None, cost_coefs=None, resume=False, flush_every=50, memory=False):
+    """
+    Roda o benchmark em todos os arquivos. Com `batch_workers` > 1 os puzzles
+    de cada arquivo são resolvidos em paralelo, na ordem do custo previsto
+    (mais longos primeiro, ver agendador.py).
+
+    Os resultados vão para ./results/backtracking_<método>.sqlite em lotes de
+    `flush_every`; com `resume=True` os puzzles já gravados são pulados. O CSV
+    é regenerado a partir do sqlite ao fim de cada arquivo. Cada lote passa
+    antes pela verificação em lote (_verify_results). `memory` liga as
+    colunas de memória (ver solve_suguru_textmode).
+    """
+    store_path = f'./results/backtracking_{backtracking_method}.sqlite'
+    if not resume and os.path.exists(store_path):
+        os.remove(store_path)
+
+    with ResultStore(store_path, batch_size=flush_every) as store:
+        for setup in DEFAULT_FILES:
+            filepath = DEFAULT_FILES[setup]
+            puzzles = load_puzzles(filepath)[:limit]  # lê o arquivo padrão de puzzles
+            done = store.done(setup)
+            pending = [p for p in puzzles if p['name'] not in done]
+            print(f'{setup}: {len(pending)} pendentes ({len(done)} já gravados)')
+
+            if batch_workers is not None and batch_workers > 1:
+                solved = solve_batch(pending, setup, batch_workers, workers=workers,
+                                     ordering=ordering, cost_coefs=cost_coefs, memory=memory)
+            else:
+                solved = (solve_suguru_textmode(p, setup=setup, workers=workers, ordering=ordering,
+                                                memory=memory)
+                          for p in pending)
+            by_name = {p['name']: p for p in pending}
+            chunk = []
+            failed = 0
+            for i, res in enumerate(solved):
+                print(f'{setup} - {i}')
+                chunk.append(res)
+                if len(chunk) >= flush_every:
+                    failed += _verify_results(chunk, by_name)
+                    for row in chunk:
+                        store.add(setup, row['id'], row)
+                    chunk = []
+            failed += _verify_results(chunk, by_name)
+            for row in chunk:
+                store.add(setup, row['id'], row)
+            store.flush()
+            if failed:
+                print(f'{setup}: {failed} soluções reprovadas na verificação')
+            results = _store_frame(store)
             results.to_csv(f'./results/backtracking_{backtracking_method}.csv')
+    return results
+
+
+def _store_frame(store):
+    import pandas as pd
+    records = store.records()
+    index = [f'{r.pop("_setup")}_{r.pop("_name")}' for r in records]
+    return pd.DataFrame(records, index=index)
+
+
+def _features_task(args):
+    puzzle, schedule = args
+    prepass = deterministic_prepass(puzzle, schedule)
+    return puzzle_features(puzzle, prepass), prepass
+
+
+def _solve_task(args):
+    puzzle, setup, options, features, predicted, prepass = args
+    res = solve_suguru_textmode(puzzle, setup=setup, prepass=prepass, **options)
+    res['celulas'] = features['celulas']
+    res['vazias_apos_regras'] = features['vazias_apos_regras']
+    res['tempo_previsto'] = predicted
+    return res
+
+
+def solve_batch(puzzles, setup, batch_workers, cost_coefs=None, **options):
+    """
+    Resolve um lote em paralelo: prevê o custo de cada puzzle, ordena do mais
+    caro para o mais barato e distribui dinamicamente entre os workers.
+    Gera os resultados conforme ficam prontos.
+
+    A pré-passada determinística dos atributos também roda no pool, com o
+    mesmo escalonamento de regras do motor, e o tabuleiro dela é o ponto de
+    partida de cada resolução: o processo principal só ordena as tarefas.
+    """
+    if not puzzles:
+        return
+    schedule = build_schedule(alldiff=options.get('alldiff', False),
+                              subset_rules=options.get('subset_rules', True))
+    with Pool(batch_workers) as pool:
+        chunksize = max(1, len(puzzles) // (4 * batch_workers))
+        pre = pool.map(_features_task, [(p, schedule) for p in puzzles], chunksize=chunksize)
+        costs = [predict_cost(f, cost_coefs) for f, _ in pre]
+        tasks = longest_first([(p, setup, options, f, c, prepass)
+                               for p, (f, prepass), c in zip(puzzles, pre, costs)], costs)
+        _, makespan = lpt_partition(costs, batch_workers)
+        print(f'{setup}: {len(tasks)} puzzles, makespan previsto {makespan:.2f}s')
+
+        for res in pool.imap_unordered(_solve_task, tasks, chunksize=1):
+            yield res
+
+
+def refit_cost_model(csv_path):
+    """Reajusta o modelo de custo com um CSV do modo em lote e compara previsto x real."""
+    import pandas as pd
+    results = pd.read_csv(csv_path)
+    rows = results.to_dict('records')
+    coefs = fit_cost_model(rows)
+    results['tempo_reajustado'] = [predict_cost({**row, 'const': 1.0}, coefs) for row in rows]
+    print(results[['tempo', 'tempo_previsto', 'tempo_reajustado']].corr(method='spearman'))
+    print(coefs)
+    return coefs
+
+
+def compare_orderings(limit=None, orderings=ORDERINGS):
+    """
+    Roda o benchmark uma vez por heurística de ordenação e resume, por
+    tabuleiro, os nós visitados e retrocessos médios de cada uma.
+    """
+    import pandas as pd
+    summaries = []
+    for ordering in orderings:
+        results = solve_all_sugurus(limit, backtracking_method=f'regiao_{ordering}', ordering=ordering)
+        summaries.append(results.groupby(['tabuleiro', 'ordenacao'])[['nos_visitados', 'backtracks', 'tempo']].mean())
+    summary = pd.concat(summaries).sort_index()
+    summary.to_csv('./results/comparacao_ordenacao.csv')
+    print(summary)
+    return summary
+
+
+def benchmark_restarts(limit=None, seeds=(0, 1, 2), schedules=('luby', 'geometric')):
+    """
+    Compara a cauda da distribuição de tempos (p50/p90/p99/máx) com e sem
+    reinícios aleatorizados, por tabuleiro.
+    """
+    import pandas as pd
+    configs = [('sem_reinicio', {})]
+    for schedule in schedules:
+        for seed in seeds:
+            configs.append((f'{schedule}_s{seed}', {'restart_schedule': schedule, 'seed': seed}))
+
+    rows = []
+    for setup in DEFAULT_FILES:
+        puzzles = load_puzzles(DEFAULT_FILES[setup])[:limit]
+        setup_rows = []
+        for name, options in configs:
+            for puzzle in puzzles:
+                res = solve_suguru_textmode(puzzle, setup=setup, **options)
+                res['config'] = name
+                setup_rows.append(res)
+        _verify_results(setup_rows, {p['name']: p for p in puzzles})
+        rows.extend(setup_rows)
+    results = pd.DataFrame(rows)
+    results.to_csv('./results/reinicios.csv')
+
+    summary = results.groupby(['tabuleiro', 'config'])['tempo'].describe(percentiles=[.5, .9, .99])
+    summary = summary[['50%', '90%', '99%', 'max']]
+    summary.to_csv('./results/reinicios_cauda.csv')
+    print(summary)
+    return summary
 
 if __name__ == "__main__":
-    limit=None
-    solve_all_sugurus(limit, backtracking_method='region')
+    parser = argparse.ArgumentParser(description="Benchmark do solver de Suguru sobre ./tabuleiros")
+    parser.add_argument("--limit", type=int, default=None, help="puzzles por arquivo")
+    parser.add_argument("--method", default="region", help="sufixo dos arquivos de resultado")
+    parser.add_argument("--batch-workers", type=int, default=None, help="processos para o lote")
+    parser.add_argument("--resume", action="store_true", help="pula puzzles já gravados no sqlite")
+    parser.add_argument("--memory", action="store_true",
+                        help="colunas de pico de memória, pilha de níveis e candidatos (tracemalloc)")
+    args = parser.parse_args()
+    solve_all_sugurus(args.limit, backtracking_method=args.method,
+                      batch_workers=args.batch_workers, resume=args.resume, memory=args.memory)
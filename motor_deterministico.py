@@ -1,40 +1,152 @@
 import itertools
+from functools import lru_cache
+
+
+DETERMINISTIC_RULES = (
+    'assign_from_singletons',
+    'hidden_single',
+    'naked_pairs',
+    'hidden_pairs',
+    'naked_triples',
+    'hidden_triples',
+    'neighbour_pointing',
+    'naked_quads',
+    'hidden_quads',
+    'alldiff',
+)
+
+# níveis de regras em ordem crescente de custo (ver DeterministicSolver.solve)
+DEFAULT_SCHEDULE = (
+    ('assign_from_singletons', 'propagate_singletons', 'hidden_single'),
+    ('naked_pairs', 'hidden_pairs', 'neighbour_pointing'),
+    ('naked_triples', 'hidden_triples'),
+    ('naked_quads', 'hidden_quads'),
+)
+
+SUBSET_RULES = ('naked_pairs', 'hidden_pairs', 'naked_triples', 'hidden_triples',
+                'naked_quads', 'hidden_quads')
+
+
+def build_schedule(alldiff=False, subset_rules=True):
+    """
+    Monta o escalonamento de regras. Com `alldiff` o propagador de
+    all-different (Régin) entra no nível 1; com `subset_rules=False` as
+    regras de pares/triplas/quádruplas, que ele subsume, são retiradas.
+    """
+    tiers = []
+    for k, tier in enumerate(DEFAULT_SCHEDULE):
+        if k == 1 and alldiff:
+            tier = ('alldiff',) + tier
+        if not subset_rules:
+            tier = tuple(name for name in tier if name not in SUBSET_RULES)
+        if tier:
+            tiers.append(tier)
+    return tuple(tiers)
+
+# tabelas pré-computadas para as regras de subconjuntos: para cada tamanho de
+# região n e cada k, todos os subconjuntos de k posições (ou dígitos-1) de
+# range(n) como (máscara, tupla de índices); e a decodificação de máscaras
+MAX_TABLE_SIZE = 9
+SUBSET_TABLES = {
+    n: {k: tuple((sum(1 << p for p in combo), combo) for combo in itertools.combinations(range(n), k))
+        for k in range(1, n + 1)}
+    for n in range(1, MAX_TABLE_SIZE + 1)
+}
+MASK_POSITIONS = [tuple(p for p in range(MAX_TABLE_SIZE) if m >> p & 1) for m in range(1 << MAX_TABLE_SIZE)]
+MASK_DIGITS = [frozenset(p + 1 for p in positions) for positions in MASK_POSITIONS]
 
 
 def rc2i(r, c, w): return r * w + c
 def i2rc(i, w): return divmod(i, w)
 
 
+@lru_cache(maxsize=16)
+def _topology(width, height, layout):
+    regions = {}
+    for i, ch in enumerate(layout):
+        regions.setdefault(ch, []).append(i)
+    neigh = []
+    for i in range(width * height):
+        r, c = i2rc(i, width)
+        neigh.append([rc2i(r + dr, c + dc, width)
+                      for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                      if (dr or dc) and 0 <= r + dr < height and 0 <= c + dc < width])
+    return regions, neigh
+
+
+def board_topology(width, height, layout):
+    """
+    Regiões (rótulo -> casas) e vizinhos de rei (casa -> casas) do tabuleiro.
+    O LevelEngineRegions cria um DeterministicSolver a cada commit; em
+    tabuleiros grandes montar a vizinhança dominava o custo, então a
+    topologia fica em cache por layout e é compartilhada (somente leitura).
+    O layout pode ser string de letras ou sequência de ids numéricos.
+    """
+    if not isinstance(layout, (str, tuple)):
+        layout = tuple(layout)
+    return _topology(width, height, layout)
+
+
+def _strongly_connected(adj):
+    # Tarjan iterativo; devolve o índice da componente de cada nó
+    n = len(adj)
+    index = [None] * n
+    low = [0] * n
+    comp = [None] * n
+    on_stack = [False] * n
+    stack = []
+    counter = 0
+    n_comp = 0
+    for root in range(n):
+        if index[root] is not None:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, k = work.pop()
+            if k == 0:
+                index[v] = low[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            if k < len(adj[v]):
+                work.append((v, k + 1))
+                w = adj[v][k]
+                if index[w] is None:
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp[w] = n_comp
+                    if w == v:
+                        break
+                n_comp += 1
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+    return comp
+
+
 class DeterministicSolver:
-    def __init__(self, width, height, layout, initial):
+    def __init__(self, width, height, layout, initial, schedule=DEFAULT_SCHEDULE):
         self.w = width
         self.h = height
         self.N = self.w * self.h
         self.layout = layout
         self.board = initial[:]
-        self.regions = {}
-        self.counter = {
-            'assign_from_singletons': 0,
-            'hidden_single': 0,
-            'naked_pairs': 0,
-            'hidden_pairs': 0,
-            'naked_triples': 0,
-            'hidden_triples': 0,
-        }
-
-        for i, ch in enumerate(layout):
-            self.regions.setdefault(ch, []).append(i)
-        self.neigh = {}
-        for i in range(self.N):
-            r, c = i2rc(i, self.w)
-            ns = []
-            for dr in (-1,0,1):
-                for dc in (-1,0,1):
-                    if dr==0 and dc==0: continue
-                    rr, cc = r+dr, c+dc
-                    if 0<=rr<self.h and 0<=cc<self.w:
-                        ns.append(rc2i(rr,cc,self.w))
-            self.neigh[i] = ns
+        self.counter = {regra: 0 for regra in DETERMINISTIC_RULES}
+        # invocações/sucessos por regra, para ajustar a ordem do escalonamento
+        self.schedule = schedule
+        self.rule_stats = {name: {'invocations': 0, 'successes': 0}
+                           for tier in schedule for name in tier}
+
+        self.regions, self.neigh = board_topology(width, height, layout)
+        # singletons já propagados: candidatos só diminuem, repropagar não muda
+        # nada; as casas preenchidas já saem propagadas de _init_candidates
+        self._propagated = {i for i, v in enumerate(self.board) if v is not None}
         self.cands = [set() for _ in range(self.N)]
         self._init_candidates()
 
@@ -54,6 +166,14 @@ class DeterministicSolver:
                     if v is not None: poss.discard(v)
                 self.cands[i] = poss
 
+    def _open_regions(self):
+        # regiões já preenchidas não têm o que eliminar; em tabuleiros grandes
+        # quase todas estão assim no fim da busca
+        board = self.board
+        for ch, cells in self.regions.items():
+            if any(board[i] is None for i in cells):
+                yield ch, cells
+
     def _elim(self, i, v):
         if v in self.cands[i] and len(self.cands[i])>1:
             self.cands[i].remove(v)
@@ -61,11 +181,22 @@ class DeterministicSolver:
         return False
 
     def _propagate_singleton(self, i):
+        changed = False
         v = next(iter(self.cands[i]))
         for j in self.regions[self.layout[i]]:
-            if j!=i: self._elim(j, v)
+            if j!=i and self._elim(j, v): changed = True
         for n in self.neigh[i]:
-            self._elim(n, v)
+            if self._elim(n, v): changed = True
+        return changed
+
+    def _propagate_singletons(self):
+        changed = False
+        for i in range(self.N):
+            if len(self.cands[i])==1 and i not in self._propagated:
+                self._propagated.add(i)
+                if self._propagate_singleton(i):
+                    changed = True
+        return changed
 
     def _assign_from_singletons(self):
         changed = False
@@ -78,7 +209,7 @@ class DeterministicSolver:
 
     def _hidden_single(self):
         changed = False
-        for ch, cells in self.regions.items():
+        for ch, cells in self._open_regions():
             n = len(cells)
             for d in range(1, n + 1):
                 occ = [i for i in cells if d in self.cands[i]]
@@ -94,7 +225,7 @@ class DeterministicSolver:
 
     def _naked_pairs(self):
         changed = False
-        for ch, cells in self.regions.items():
+        for ch, cells in self._open_regions():
             pairs = {}
             for i in cells:
                 if len(self.cands[i]) == 2:
@@ -111,81 +242,178 @@ class DeterministicSolver:
                                     changed = True
         return changed
 
-    def _hidden_pairs(self):
+    # ---- subconjuntos (pares/triplas/quádruplas) por tabela ----
+    def _region_masks(self, cells):
+        # máscara de candidatos por posição e de ocorrências (posições) por dígito
+        cand_masks = []
+        occ = [0] * (len(cells) + 1)
+        for p, i in enumerate(cells):
+            m = 0
+            for d in self.cands[i]:
+                m |= 1 << (d - 1)
+                if d <= len(cells):
+                    occ[d] |= 1 << p
+            cand_masks.append(m)
+        return cand_masks, occ
+
+    def _naked_subsets(self, k, regra):
         changed = False
-        for ch, cells in self.regions.items():
+        for ch, cells in self._open_regions():
             n = len(cells)
-            occ = {d: [i for i in cells if d in self.cands[i]] for d in range(1, n + 1)}
-            for d1, d2 in itertools.combinations(range(1, n + 1), 2):
-                s = set(occ[d1]) | set(occ[d2])
-                if len(s) == 2:
-                    for i in s:
-                        newset = self.cands[i] & {d1, d2}
-                        if newset != self.cands[i]:
-                            self.cands[i] = set(newset)
-                            self.counter['hidden_pairs'] += 1
+            if n <= k or n > MAX_TABLE_SIZE:
+                continue
+            cand_masks, _ = self._region_masks(cells)
+            for pos_mask, positions in SUBSET_TABLES[n][k]:
+                union = 0
+                for p in positions:
+                    union |= cand_masks[p]
+                if union.bit_count() != k:
+                    continue
+                digits = MASK_DIGITS[union]
+                for p, j in enumerate(cells):
+                    if pos_mask >> p & 1:
+                        continue
+                    for d in digits:
+                        if self._elim(j, d):
+                            cand_masks[p] &= ~(1 << (d - 1))
+                            self.counter[regra] += 1
                             changed = True
         return changed
 
-    def _naked_triples(self):
+    def _hidden_subsets(self, k, regra, min_size=None):
         changed = False
-        for ch, cells in self.regions.items():
-            for triple in itertools.combinations(cells, 3):
-                union = set().union(*(self.cands[i] for i in triple))
-                if 1 < len(union) == 3:
-                    for j in cells:
-                        if j not in triple:
-                            for d in union:
-                                if self._elim(j, d):
-                                    self.counter['naked_triples'] += 1
-                                    changed = True
+        for ch, cells in self._open_regions():
+            n = len(cells)
+            if n < (min_size or k) or n > MAX_TABLE_SIZE:
+                continue
+            _, occ = self._region_masks(cells)
+            for digit_mask, digits in SUBSET_TABLES[n][k]:
+                occ_union = 0
+                for d0 in digits:
+                    occ_union |= occ[d0 + 1]
+                if occ_union.bit_count() != k:
+                    continue
+                keep = MASK_DIGITS[digit_mask]
+                for p in MASK_POSITIONS[occ_union]:
+                    i = cells[p]
+                    newset = self.cands[i] & keep
+                    if newset != self.cands[i]:
+                        self.cands[i] = newset
+                        self.counter[regra] += 1
+                        changed = True
         return changed
 
+    def _hidden_pairs(self):
+        return self._hidden_subsets(2, 'hidden_pairs')
+
+    def _naked_triples(self):
+        return self._naked_subsets(3, 'naked_triples')
+
     def _hidden_triples(self):
+        return self._hidden_subsets(3, 'hidden_triples')
+
+    def _naked_quads(self):
+        return self._naked_subsets(4, 'naked_quads')
+
+    def _hidden_quads(self):
+        return self._hidden_subsets(4, 'hidden_quads', min_size=5)
+
+    def _neighbour_pointing(self):
+        # se todas as posições possíveis de d numa região são vizinhas de uma
+        # casa X fora dela, d não pode estar em X
         changed = False
-        for ch, cells in self.regions.items():
+        for ch, cells in self._open_regions():
             n = len(cells)
-            occ = {d: [i for i in cells if d in self.cands[i]] for d in range(1, n + 1)}
-            for trio in itertools.combinations(range(1, n + 1), 3):
-                occ_union = set().union(*(set(occ[d]) for d in trio))
-                if len(occ_union) == 3:
-                    for i in occ_union:
-                        newset = self.cands[i] & set(trio)
-                        if newset != self.cands[i]:
-                            self.cands[i] = set(newset)
-                            self.counter['hidden_triples'] += 1
+            for d in range(1, n + 1):
+                occ = [i for i in cells if d in self.cands[i]]
+                if len(occ) < 2:
+                    continue
+                common = set(self.neigh[occ[0]])
+                for i in occ[1:]:
+                    common.intersection_update(self.neigh[i])
+                for x in common:
+                    if self.layout[x] != ch and self._elim(x, d):
+                        self.counter['neighbour_pointing'] += 1
+                        changed = True
+        return changed
+
+    # ---- all-different por região (Régin) ----
+    def _region_matching(self, cells, doms):
+        # emparelhamento máximo casas x dígitos por caminhos aumentantes
+        n = len(cells)
+        match_digit = [None] * n          # posição -> dígito
+        match_cell = [None] * (n + 1)     # dígito -> posição
+
+        def augment(p, seen):
+            for d in doms[p]:
+                if d in seen:
+                    continue
+                seen.add(d)
+                if match_cell[d] is None or augment(match_cell[d], seen):
+                    match_digit[p] = d
+                    match_cell[d] = p
+                    return True
+            return False
+
+        for p in range(n):
+            if not augment(p, set()):
+                return None
+        return match_digit
+
+    def _alldiff(self):
+        changed = False
+        for ch, cells in self._open_regions():
+            n = len(cells)
+            doms = [sorted(d for d in self.cands[i] if d <= n) for i in cells]
+            if all(len(dom) == 1 for dom in doms):
+                continue
+            match_digit = self._region_matching(cells, doms)
+            if match_digit is None:
+                # sem emparelhamento perfeito: contradição, fica para o backtracking
+                continue
+
+            # grafo orientado: posição -> dígito emparelhado; dígito -> demais posições
+            # nós 0..n-1 são posições, n..2n-1 são os dígitos 1..n
+            adj = [[] for _ in range(2 * n)]
+            for p, dom in enumerate(doms):
+                for d in dom:
+                    if d == match_digit[p]:
+                        adj[p].append(n + d - 1)
+                    else:
+                        adj[n + d - 1].append(p)
+            comp = _strongly_connected(adj)
+
+            # como todo dígito está emparelhado, uma aresta fora do
+            # emparelhamento só tem suporte dentro de uma mesma SCC
+            for p, dom in enumerate(doms):
+                for d in dom:
+                    if d != match_digit[p] and comp[p] != comp[n + d - 1]:
+                        if self._elim(cells[p], d):
+                            self.counter['alldiff'] += 1
                             changed = True
         return changed
 
+    def _run_rule(self, name):
+        stats = self.rule_stats[name]
+        stats['invocations'] += 1
+        if getattr(self, '_' + name)():
+            stats['successes'] += 1
+            return True
+        return False
+
     def solve(self):
-        changed=True
-        while changed:
-            changed=False
-            if self._assign_from_singletons(): 
-                changed=True
-            
-            for i in range(self.N):
-                if len(self.cands[i])==1:
-                    self._propagate_singleton(i)
-
-            if self._hidden_single(): 
-                changed=True
-            if self._assign_from_singletons(): 
-                changed=True
-            for i in range(self.N):
-                if len(self.cands[i])==1:
-                    self._propagate_singleton(i)
-
-            if self._naked_pairs(): 
-                changed=True
-            if self._hidden_pairs(): 
-                changed=True
-            if self._naked_triples(): 
-                changed=True
-            if self._hidden_triples(): 
-                changed=True
-            if self._assign_from_singletons(): 
-                changed=True
+        # escalonamento por custo: o nível 0 roda até o ponto fixo; os níveis
+        # seguintes só entram quando os anteriores travam, e qualquer mudança
+        # volta para o nível 0
+        tier = 0
+        while tier < len(self.schedule):
+            progressed = False
+            for name in self.schedule[tier]:
+                if self._run_rule(name):
+                    progressed = True
+                    if tier > 0:
+                        break
+            tier = 0 if progressed else tier + 1
 
         solved = sum(1 for v in self.board if v is not None)
         return self.board[:], solved, (solved==self.N), self.counter
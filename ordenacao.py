@@ -0,0 +1,111 @@
+import math
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+
+from puzzles import load_puzzles
+
+
+# =========================
+# Heurísticas de ordenação das permutações de uma região
+# =========================
+#
+# - "lex":   ordem lexicográfica (comportamento original do _region_candidates)
+# - "lcv":   least-constraining value; tenta primeiro a permutação que elimina
+#            menos candidatos das casas vizinhas fora da região
+# - "stats": ordena pela verossimilhança dos dígitos segundo estatísticas
+#            extraídas das respostas dos arquivos em ./tabuleiros
+
+ORDERINGS = ("lex", "lcv", "stats")
+
+STATS_FILES = [
+    "./tabuleiros/SUG_6x6_v12.txt",
+    "./tabuleiros/SUG_8x8_v12.txt",
+    "./tabuleiros/SUG_15x10n6_v12.txt",
+    "./tabuleiros/SUG_15x10_v12.txt",
+]
+
+
+def _cell_key(engine, idx) -> Tuple[int, int]:
+    # (tamanho da região, vizinhos dentro da própria região)
+    cells = engine.regions[engine.layout[idx]]
+    inside = sum(1 for n in engine.neigh[idx] if engine.layout[n] == engine.layout[idx])
+    return len(cells), inside
+
+
+def learn_value_stats(paths=None) -> Dict[Tuple[int, int], Dict[int, float]]:
+    """
+    Frequência (log, com suavização de Laplace) de cada dígito por tipo de
+    casa, onde o tipo é (tamanho da região, nº de vizinhos na mesma região).
+    """
+    counts: Dict[Tuple[int, int], Dict[int, int]] = {}
+    for path in paths or STATS_FILES:
+        for p in load_puzzles(path):
+            w, h, layout, answer = p["width"], p["height"], p["layout"], p["answer"]
+            sizes: Dict[str, int] = {}
+            for ch in layout:
+                sizes[ch] = sizes.get(ch, 0) + 1
+            for i, v in enumerate(answer):
+                r, c = divmod(i, w)
+                inside = 0
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        rr, cc = r + dr, c + dc
+                        if (dr or dc) and 0 <= rr < h and 0 <= cc < w and layout[rr * w + cc] == layout[i]:
+                            inside += 1
+                key = (sizes[layout[i]], inside)
+                counts.setdefault(key, {})
+                counts[key][v] = counts[key].get(v, 0) + 1
+
+    stats = {}
+    for key, by_digit in counts.items():
+        size = key[0]
+        total = sum(by_digit.values()) + size
+        stats[key] = {d: math.log((by_digit.get(d, 0) + 1) / total) for d in range(1, size + 1)}
+    return stats
+
+
+@lru_cache(maxsize=1)
+def default_value_stats():
+    return learn_value_stats()
+
+
+def order_lcv(engine, board, label, perms: List[List[int]]) -> List[List[int]]:
+    cells = engine.regions[label]
+    cell_set = set(cells)
+    doms = engine.compute_domains(board)
+
+    def eliminations(perm):
+        total = 0
+        for idx, val in zip(cells, perm):
+            if board[idx] is not None:
+                continue
+            for n in engine.neigh[idx]:
+                if n not in cell_set and board[n] is None and val in doms[n]:
+                    total += 1
+        return total
+
+    return sorted(perms, key=eliminations)
+
+
+def order_stats(engine, board, label, perms: List[List[int]],
+                stats: Optional[Dict] = None) -> List[List[int]]:
+    stats = stats if stats is not None else default_value_stats()
+    cells = engine.regions[label]
+    keys = [_cell_key(engine, idx) for idx in cells]
+
+    def log_likelihood(perm):
+        total = 0.0
+        for idx, key, val in zip(cells, keys, perm):
+            if board[idx] is None and key in stats:
+                total += stats[key].get(val, 0.0)
+        return -total
+
+    return sorted(perms, key=log_likelihood)
+
+
+def order_candidates(engine, board, label, perms: List[List[int]]) -> List[List[int]]:
+    if engine.ordering == "lcv":
+        return order_lcv(engine, board, label, perms)
+    if engine.ordering == "stats":
+        return order_stats(engine, board, label, perms, engine.value_stats)
+    return perms
@@ -0,0 +1,104 @@
+import itertools
+import sys
+from array import array
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
+
+
+# =========================
+# Tabelas de permutações por tamanho de região
+# =========================
+#
+# Para cada tamanho n, todas as permutações de 1..n (em ordem lexicográfica)
+# são geradas uma única vez. Cada (posição, dígito) tem um inteiro usado como
+# bitset dos índices das permutações que colocam aquele dígito ali. Filtrar
+# as permutações de uma região vira um OR por posição (dígitos permitidos) e
+# um AND entre posições.
+
+
+@lru_cache(maxsize=None)
+def permutation_table(n: int) -> Tuple[Tuple[Tuple[int, ...], ...], List[List[int]]]:
+    perms = tuple(itertools.permutations(range(1, n + 1)))
+    index = [[0] * (n + 1) for _ in range(n)]
+    for k, perm in enumerate(perms):
+        bit = 1 << k
+        for p, v in enumerate(perm):
+            index[p][v] |= bit
+    return perms, index
+
+
+@lru_cache(maxsize=None)
+def _column(n: int, p: int, allowed: int) -> int:
+    # bitset das permutações cujo dígito na posição p está em `allowed`
+    _, index = permutation_table(n)
+    col = 0
+    for v in range(1, n + 1):
+        if allowed >> v & 1:
+            col |= index[p][v]
+    return col
+
+
+def filter_permutations(n: int, allowed_masks: List[int]) -> List[List[int]]:
+    """
+    Permutações de 1..n em que a posição p usa um dígito de `allowed_masks[p]`
+    (bit v ligado = dígito v permitido), em ordem lexicográfica.
+    """
+    perms, _ = permutation_table(n)
+    selected = (1 << len(perms)) - 1
+    for p, allowed in enumerate(allowed_masks):
+        selected &= _column(n, p, allowed)
+        if not selected:
+            return []
+
+    out = []
+    while selected:
+        low = selected & -selected
+        out.append(list(perms[low.bit_length() - 1]))
+        selected ^= low
+    return out
+
+
+class PackedPerms:
+    """
+    Permutações de uma região num único array de bytes (n por permutação),
+    como ficam guardadas nos níveis do LevelEngineRegions: uma lista de
+    listas custa ~100 bytes por permutação de 5 dígitos, o array 5.
+    Indexar devolve uma lista nova; fatiar devolve outro PackedPerms.
+    """
+
+    __slots__ = ("n", "data")
+
+    def __init__(self, perms: Sequence[Sequence[int]] = ()):
+        self.n = len(perms[0]) if len(perms) else 0
+        self.data = array("B", itertools.chain.from_iterable(perms))
+
+    def __len__(self) -> int:
+        return len(self.data) // self.n if self.n else 0
+
+    def __getitem__(self, k):
+        n = self.n
+        if isinstance(k, slice):
+            start, stop, step = k.indices(len(self))
+            if step != 1:
+                raise ValueError("PackedPerms só aceita fatias contíguas")
+            out = PackedPerms()
+            out.n = n
+            out.data = self.data[start * n:max(start, stop) * n]
+            return out
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        return self.data[k * n:(k + 1) * n].tolist()
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.data)
+
+
+def pack_permutations(perms: Union[PackedPerms, Sequence[Sequence[int]]]) -> PackedPerms:
+    """PackedPerms com as permutações (o próprio objeto se já estiver empacotado)."""
+    return perms if isinstance(perms, PackedPerms) else PackedPerms(perms)
@@ -22,39 +22,69 @@ def parse_answer(ans: str, width: int, height: int):
         digits = (digits + [0]*expected)[:expected]
     return digits
 
+def parse_layout(field: str):
+    """
+    Campo de layout. No formato original cada casa é uma letra (A-Z, a-z),
+    o que limita o tabuleiro a 52 regiões; no formato estendido as regiões
+    são ids numéricos separados por vírgula ("0,0,1,2,...") e o layout vira
+    uma tupla de inteiros. Os motores aceitam os dois.
+    """
+    field = field.strip()
+    if "," in field:
+        return tuple(int(tok) for tok in field.split(","))
+    return field
+
+def encode_layout(layout) -> str:
+    """Inverso de parse_layout: string de letras como está, ids numéricos com vírgulas."""
+    if isinstance(layout, str):
+        return layout
+    return ",".join(str(rid) for rid in layout)
+
+def parse_line(line: str):
+    """Converte uma linha no formato de ./tabuleiros em puzzle; None para comentários e linhas vazias."""
+    if not line.strip() or line.lstrip().startswith("#"):
+        return None
+    parts = line.rstrip("\n").split("\t")
+    if len(parts) < 6:
+        parts = line.strip().split()
+        if len(parts) < 6:
+            return None
+        name, w, h, giv, layout, ans = parts[:6]
+        comment = " ".join(parts[6:]) if len(parts) > 6 else ""
+    else:
+        name, w, h, giv, layout, ans = parts[:6]
+        comment = parts[6] if len(parts) > 6 else ""
+    width = int(w); height = int(h)
+    givens = decode_givens(giv, width, height)
+    layout = parse_layout(layout)
+    if len(layout) != width * height:
+        raise ValueError(f"layout com {len(layout)} casas, esperado {width * height}")
+    answer = parse_answer(ans, width, height)
+    region_avg_size, n_regions = get_region_size(answer)
+    difficulty = get_difficulty(line)
+    return {
+        "name": name, "width": width, "height": height,
+        "givens": givens, "layout": layout, "answer": answer, "comment": comment,
+        'region_avg_size': region_avg_size, 'n_regions':n_regions, 'difficulty': difficulty,
+    }
+
+
 def load_puzzles(path: str):
     puzzles = []
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
-            if not line.strip() or line.lstrip().startswith("#"):
-                continue
-            parts = line.rstrip("\n").split("\t")
-            if len(parts) < 6:
-                parts = line.strip().split()
-                if len(parts) < 6:
-                    continue
-                name, w, h, giv, layout, ans = parts[:6]
-                comment = " ".join(parts[6:]) if len(parts) > 6 else ""
-            else:
-                name, w, h, giv, layout, ans = parts[:6]
-                comment = parts[6] if len(parts) > 6 else ""
-            width = int(w); height = int(h)
-            givens = decode_givens(giv, width, height)
-            answer = parse_answer(ans, width, height)
-            region_avg_size, n_regions = get_region_size(answer)
-            difficulty = get_difficulty(line)
-            puzzles.append({
-                "name": name, "width": width, "height": height,
-                "givens": givens, "layout": layout, "answer": answer, "comment": comment,
-                'region_avg_size': region_avg_size, 'n_regions':n_regions, 'difficulty': difficulty,
-                
-            })
+            puzzle = parse_line(line)
+            if puzzle is not None:
+                puzzles.append(puzzle)
     return puzzles
 
 
 def get_difficulty(line):
     search_str = 'diff='
-    i = str(line).find(search_str)+len(search_str)
+    i = str(line).find(search_str)
+    if i < 0:
+        return 0
+    i += len(search_str)
     diff = int(line[i])
     return diff
 
@@ -74,6 +104,9 @@ def infer_region_sizes(counts):
 
 
 def get_region_size(answer):  
+    # resposta ausente ou de preenchimento (só zeros): sem estatísticas de região
+    if not any(answer):
+        return 0.0, 0
     counter = {}
     
     for a in answer:
@@ -0,0 +1,50 @@
+from typing import Optional
+
+
+# =========================
+# Agendas de reinício da busca
+# =========================
+#
+# Os limites são contados em retrocessos desde o último reinício. A
+# sequência de Luby (1, 1, 2, 1, 1, 2, 4, ...) é ótima a menos de fator
+# logarítmico sem conhecer a distribuição de tempos; a geométrica cresce
+# base * factor^k. Ambas são ilimitadas, então a busca continua completa.
+
+RESTART_SCHEDULES = ("luby", "geometric")
+
+
+def luby(i: int) -> int:
+    """i-ésimo termo (a partir de 1) da sequência de Luby."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while True:
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+
+
+class RestartPolicy:
+    def __init__(self, schedule: str, base: int = 32, factor: float = 1.5):
+        if schedule not in RESTART_SCHEDULES:
+            raise ValueError(f"agenda de reinício desconhecida: {schedule}")
+        self.schedule = schedule
+        self.base = base
+        self.factor = factor
+        self.restarts = 0
+
+    def limit(self) -> int:
+        # limite de retrocessos da rodada corrente
+        if self.schedule == "luby":
+            return self.base * luby(self.restarts + 1)
+        return int(self.base * self.factor ** self.restarts)
+
+    def next_round(self):
+        self.restarts += 1
+
+
+def make_policy(schedule: Optional[str], base: int = 32, factor: float = 1.5) -> Optional[RestartPolicy]:
+    return RestartPolicy(schedule, base, factor) if schedule else None
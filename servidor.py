@@ -0,0 +1,441 @@
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from cli import puzzle_from_json
+
+
+# =========================
+# Servidor local de resolução (asyncio + pool de processos)
+# =========================
+#
+# Protocolo de linhas: cada linha do cliente é um objeto JSON com o puzzle
+# (mesmos campos da CLI: name, width, height, layout, givens) e, opcional,
+# "id" e "timeout" (segundos). A resposta é uma linha JSON com o mesmo "id",
+# na ordem em que os puzzles terminam. {"op": "metrics"} devolve as métricas.
+#
+# Pedidos que chegam juntos são agrupados (janela curta ou até `max_batch`)
+# e cada lote vai inteiro para um worker. Os workers ficam vivos entre
+# pedidos e guardam um LevelEngineRegions por layout: só o estado da busca é
+# refeito (LevelEngineRegions.reset), regiões/vizinhos/Zobrist não. Com
+# --workers 0 tudo roda no próprio laço de eventos: cada pedido é uma
+# corrotina (LevelEngineRegions.solve_async) que cede a cada STEP_NODES
+# permutações testadas.
+#
+#   python servidor.py serve --port 8765 --workers 4
+#   python servidor.py bench tabuleiros/SUG_15x10_v12.txt --requests 400
+
+ENGINE_CACHE_SIZE = 64
+# permutações testadas entre duas checagens de prazo / cessões do laço
+STEP_NODES = 64
+
+_engines: "OrderedDict[tuple, object]" = OrderedDict()
+
+
+def _init_worker():
+    from solver_regiao import LevelEngineRegions  # noqa: F401 (pré-importa no worker)
+    from permutacoes import permutation_table
+    for n in range(1, 7):
+        permutation_table(n)
+
+
+def _worker_engine(puzzle: Dict, options: Dict):
+    from solver_regiao import LevelEngineRegions
+    key = (puzzle["width"], puzzle["height"], puzzle["layout"], tuple(sorted(options.items())))
+    engine = _engines.get(key)
+    if engine is None:
+        engine = LevelEngineRegions(puzzle["width"], puzzle["height"], puzzle["layout"],
+                                    puzzle["givens"], **options)
+        _engines[key] = engine
+        if len(_engines) > ENGINE_CACHE_SIZE:
+            _engines.popitem(last=False)
+        return engine, False
+    _engines.move_to_end(key)
+    engine.reset(puzzle["givens"])
+    return engine, True
+
+
+def _run_until(engine, deadline: float) -> str:
+    # busca em passos de STEP_NODES permutações, checando o prazo (time.time) entre eles
+    status = "start"
+    while status not in ("solved", "unsat"):
+        steps = engine.level_steps(STEP_NODES)
+        status = "running"
+        while status == "running":
+            if time.time() > deadline and not engine.is_target_solved(engine.board):
+                steps.close()
+                return "timeout"
+            try:
+                status, _ = next(steps)
+            except StopIteration as stop:
+                status, _ = stop.value
+    return status
+
+
+def _result(record: Dict, puzzle: Dict, engine, status: str, start: float, **extra) -> Dict:
+    board = engine.board
+    record.update(
+        name=puzzle["name"], status=status, solved=None not in board,
+        board="".join(str(v) if v is not None else "." for v in board),
+        solve_time=time.perf_counter() - start,
+        nodes_visited=engine.nodes_visited, backtracks=engine.backtracks, **extra,
+    )
+    return record
+
+
+def _solve_one(request: Dict) -> Dict:
+    record = {"id": request["id"]}
+    start = time.perf_counter()
+    try:
+        puzzle = puzzle_from_json(request["puzzle"])
+        engine, warm = _worker_engine(puzzle, request.get("options", {}))
+        # `deadline` é absoluto (time.time) para valer entre processos; um
+        # pedido vencido na fila do lote nem começa
+        if time.time() > request["deadline"]:
+            status = "timeout"
+        else:
+            _, fully = engine.apply_rules()
+            status = "solved" if fully else _run_until(engine, request["deadline"])
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+        return record
+    return _result(record, puzzle, engine, status, start, warm=warm, pid=os.getpid())
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _solve_batch(requests: List[Dict]) -> List[Dict]:
+    return [_solve_one(req) for req in requests]
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class SolveServer:
+    def __init__(self, workers: Optional[int] = None, batch_window: float = 0.005,
+                 max_batch: int = 16, default_timeout: float = 10.0, grace: float = 1.0):
+        # workers=0: resolve no próprio laço de eventos (solve_async), sem pool
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.default_timeout = default_timeout
+        self.grace = grace
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.server = None
+        self.queue: "asyncio.Queue" = None
+        self._batcher_task = None
+
+        self.counters = {"requests": 0, "completed": 0, "solved": 0, "timeouts": 0,
+                         "errors": 0, "batches": 0, "batched_requests": 0, "warm_hits": 0}
+        self.latencies: deque = deque(maxlen=4096)
+        self.finished_at: deque = deque(maxlen=4096)
+        self.started = time.perf_counter()
+
+    # ---- ciclo de vida ----
+    async def start(self, host: str = "127.0.0.1", port: int = 0, unix_path: Optional[str] = None):
+        self.queue = asyncio.Queue()
+        if self.workers:
+            await self._start_pool()
+        if unix_path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        self.started = time.perf_counter()
+        return self.server
+
+    async def _start_pool(self):
+        # spawn: workers criados sob demanda por fork herdariam os sockets
+        # abertos das conexões e o cliente nunca veria o fim da resposta
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        mp_context=mp.get_context("spawn"))
+        # sobe os workers antes de aceitar conexões (partida fora da latência)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping) for _ in range(self.workers)))
+        self._batcher_task = asyncio.create_task(self._batcher())
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._batcher_task is not None:
+            self._batcher_task.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---- conexões ----
+    async def _handle(self, reader, writer):
+        pending = set()
+        lineno = 0
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                lineno += 1
+                if not line.strip():
+                    continue
+                try:
+                    msg = json.loads(line)
+                except ValueError as e:
+                    self._write(writer, {"id": lineno, "status": "error", "error": f"JSON inválido: {e}"})
+                    continue
+                if msg.get("op") == "metrics":
+                    self._write(writer, {"id": msg.get("id", lineno), **self.metrics()})
+                    continue
+                task = asyncio.create_task(self._respond(writer, msg, lineno))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _write(self, writer, record):
+        writer.write((json.dumps(record) + "\n").encode())
+
+    async def _respond(self, writer, msg, lineno):
+        record = await self.submit(msg, default_id=lineno)
+        self._write(writer, record)
+        await writer.drain()
+
+    async def submit(self, msg: Dict, default_id=None) -> Dict:
+        """Enfileira um pedido e espera o resultado (ou o prazo)."""
+        loop = asyncio.get_running_loop()
+        self.counters["requests"] += 1
+        received = time.perf_counter()
+        timeout = float(msg.get("timeout", self.default_timeout))
+        req_id = msg.get("id", default_id)
+        puzzle = {k: v for k, v in msg.items() if k not in ("id", "timeout", "op", "options")}
+        request = {"id": req_id, "puzzle": puzzle, "deadline": time.time() + timeout,
+                   "options": msg.get("options", {})}
+        if not self.workers:
+            record = await self._solve_inline(request, timeout)
+            latency = time.perf_counter() - received
+            record["latency"] = latency
+            self._account(record, latency)
+            return record
+        future = loop.create_future()
+        await self.queue.put((request, future))
+        try:
+            # o worker interrompe a busca no prazo; a folga cobre a volta do
+            # lote e um worker preso num nível longo
+            record = await asyncio.wait_for(asyncio.shield(future), timeout + self.grace)
+        except asyncio.TimeoutError:
+            record = {"id": req_id, "status": "timeout", "solved": False}
+        latency = time.perf_counter() - received
+        record["latency"] = latency
+        self._account(record, latency)
+        return record
+
+    async def _solve_inline(self, request: Dict, timeout: float) -> Dict:
+        # pedidos simultâneos se intercalam a cada STEP_NODES permutações
+        from solver_regiao import LevelEngineRegions
+        record = {"id": request["id"]}
+        start = time.perf_counter()
+        try:
+            puzzle = puzzle_from_json(request["puzzle"])
+            engine = LevelEngineRegions(puzzle["width"], puzzle["height"], puzzle["layout"],
+                                        puzzle["givens"], **request["options"])
+            status, _ = await engine.solve_async(STEP_NODES, deadline=start + timeout)
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+            return record
+        return _result(record, puzzle, engine, status, start)
+
+    def _account(self, record, latency):
+        self.counters["completed"] += 1
+        status = record.get("status")
+        if record.get("solved"):
+            self.counters["solved"] += 1
+        if status == "timeout":
+            self.counters["timeouts"] += 1
+        elif status == "error":
+            self.counters["errors"] += 1
+        if record.get("warm"):
+            self.counters["warm_hits"] += 1
+        self.latencies.append(latency)
+        self.finished_at.append(time.perf_counter())
+
+    # ---- micro-lotes ----
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        free = asyncio.Semaphore(self.workers)
+        while True:
+            # com todos os workers ocupados os pedidos se acumulam no próximo lote
+            await free.acquire()
+            batch = [await self.queue.get()]
+            # carga leve: lote unitário e sem espera; com fila, divide o
+            # acúmulo entre os workers (até `max_batch`)
+            target = min(self.max_batch, 1 + self.queue.qsize() // self.workers)
+            window_end = loop.time() + self.batch_window
+            while len(batch) < target:
+                remaining = window_end - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            now = time.time()
+            live = [(req, fut) for req, fut in batch if not fut.done() and req["deadline"] > now]
+            for req, fut in batch:
+                if not fut.done() and req["deadline"] <= now:
+                    fut.set_result({"id": req["id"], "status": "timeout", "solved": False})
+            if not live:
+                free.release()
+                continue
+
+            self.counters["batches"] += 1
+            self.counters["batched_requests"] += len(live)
+            work = loop.run_in_executor(self.pool, _solve_batch, [req for req, _ in live])
+            work.add_done_callback(lambda w, live=live: self._deliver(w, live, free))
+
+    def _deliver(self, work, live, free):
+        free.release()
+        if work.cancelled():
+            return
+        exc = work.exception()
+        for k, (req, fut) in enumerate(live):
+            if fut.done():
+                continue
+            if exc is not None:
+                fut.set_result({"id": req["id"], "status": "error", "error": f"{type(exc).__name__}: {exc}"})
+            else:
+                fut.set_result(work.result()[k])
+
+    # ---- métricas ----
+    def metrics(self) -> Dict:
+        lat = sorted(self.latencies)
+        uptime = time.perf_counter() - self.started
+        now = time.perf_counter()
+        recent = sum(1 for t in self.finished_at if now - t <= 10.0)
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "uptime": uptime,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "avg_batch": self.counters["batched_requests"] / batches if batches else 0.0,
+            "throughput": self.counters["completed"] / uptime if uptime > 0 else 0.0,
+            "throughput_10s": recent / min(10.0, uptime) if uptime > 0 else 0.0,
+            "latency_p50": _percentile(lat, 0.50),
+            "latency_p90": _percentile(lat, 0.90),
+            "latency_p99": _percentile(lat, 0.99),
+            "latency_max": lat[-1] if lat else 0.0,
+        }
+
+
+# =========================
+# Cliente e benchmark em localhost
+# =========================
+
+async def request_many(messages: List[Dict], host: str = "127.0.0.1", port: int = 8765,
+                       unix_path: Optional[str] = None) -> List[Dict]:
+    """Envia os pedidos numa conexão e devolve as respostas na ordem em que chegaram."""
+    if unix_path is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    for msg in messages:
+        writer.write((json.dumps(msg) + "\n").encode())
+    await writer.drain()
+    writer.write_eof()
+    responses = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        responses.append(json.loads(line))
+    writer.close()
+    return responses
+
+
+def _puzzle_message(puzzle: Dict, req_id, timeout: Optional[float]) -> Dict:
+    msg = {"id": req_id, "name": puzzle["name"], "width": puzzle["width"], "height": puzzle["height"],
+           "layout": puzzle["layout"], "givens": puzzle["givens"]}
+    if timeout is not None:
+        msg["timeout"] = timeout
+    return msg
+
+
+async def bench(path: str, requests: int = 200, connections: int = 8, workers: Optional[int] = None,
+                timeout: Optional[float] = None, batch_window: float = 0.005, max_batch: int = 16,
+                distinct: Optional[int] = None) -> Dict:
+    """
+    Sobe o servidor numa porta livre, dispara `requests` pedidos em
+    `connections` conexões e mede. Os pedidos repetem os `distinct` primeiros
+    puzzles do arquivo (todos, por padrão).
+    """
+    from puzzles import load_puzzles
+    puzzles = load_puzzles(path)[:distinct]
+    server = SolveServer(workers=workers, batch_window=batch_window, max_batch=max_batch)
+    await server.start(port=0)
+    host, port = server.address()[:2]
+    try:
+        messages = [_puzzle_message(puzzles[k % len(puzzles)], k, timeout) for k in range(requests)]
+        chunks = [messages[c::connections] for c in range(connections)]
+        start = time.perf_counter()
+        answers = await asyncio.gather(*(request_many(chunk, host, port) for chunk in chunks))
+        wall = time.perf_counter() - start
+        expected = {k: puzzles[k % len(puzzles)]["answer"] for k in range(requests)}
+        wrong = sum(1 for chunk in answers for r in chunk
+                    if r.get("solved") and [int(c) for c in r["board"]] != expected[r["id"]])
+        metrics = server.metrics()
+        metrics.update(wall=wall, wall_throughput=requests / wall, wrong=wrong)
+        return metrics
+    finally:
+        await server.close()
+
+
+async def serve(host: str, port: int, unix_path: Optional[str], **options):
+    server = SolveServer(**options)
+    await server.start(host, port, unix_path)
+    print(f"servindo em {unix_path or server.address()}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de resolução de Suguru")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--unix", default=None, help="caminho de socket Unix (no lugar de TCP)")
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("file")
+    p_bench.add_argument("--requests", type=int, default=200)
+    p_bench.add_argument("--connections", type=int, default=8)
+    p_bench.add_argument("--timeout", type=float, default=None)
+    p_bench.add_argument("--distinct", type=int, default=None, help="quantos puzzles diferentes")
+    for p in (p_serve, p_bench):
+        p.add_argument("--workers", type=int, default=None)
+        p.add_argument("--batch-window", type=float, default=0.005, help="segundos")
+        p.add_argument("--max-batch", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers,
+                          batch_window=args.batch_window, max_batch=args.max_batch))
+    else:
+        result = asyncio.run(bench(args.file, args.requests, args.connections, args.workers,
+                                   args.timeout, args.batch_window, args.max_batch, args.distinct))
+        print(json.dumps(result, indent=2))
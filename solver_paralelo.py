@@ -0,0 +1,233 @@
+import multiprocessing as mp
+import queue
+from typing import List, Dict, Optional, Tuple
+
+from permutacoes import pack_permutations
+from solver_regiao import LevelEngineRegions, RegionLevelState
+
+
+# =========================
+# Busca paralela por subárvores
+# =========================
+#
+# Uma tarefa é uma tupla (board_before, region_label, candidates):
+#   - region_label None  -> "board_before" é uma raiz já propagada;
+#   - caso contrário     -> nível ainda não explorado: tenta as permutações
+#                           "candidates" da região a partir de "board_before".
+# Cada worker explora sua subárvore com o LevelEngineRegions normal. Quando
+# passa do orçamento de nós e há workers ociosos, ele devolve os irmãos ainda
+# não testados da sua pilha como novas tarefas (divisão de trabalho sob
+# demanda), e o processo principal as recoloca na fila.
+
+_ctx: Dict = {}
+
+
+def _init_worker(width, height, layout, ordering, count_all, node_budget, queued, workers, engine_options):
+    _ctx.update(width=width, height=height, layout=layout, ordering=ordering, count_all=count_all,
+                node_budget=node_budget, queued=queued, workers=workers, engine_options=engine_options)
+
+
+def _open_level(engine, board_before, label, candidates) -> bool:
+    # mesmo laço de irmãos do one_level, mas para um nível recebido pronto
+    for k, assignment in enumerate(candidates):
+        engine.nodes_visited += 1
+        engine.max_depth = max(engine.max_depth, len(engine.levels) + 1)
+        ok, _, new_board, _, _ = engine._commit_region(board_before, label, assignment)
+        if not ok:
+            continue
+        engine.board = new_board
+        engine.levels.append(RegionLevelState(
+            board_before=board_before,
+            region_label=label,
+            candidates=pack_permutations(candidates),
+            next_idx=k + 1,
+            value_fixed=assignment[:],
+            board_after=new_board,
+            domains=engine._commit_domains,
+        ))
+        return True
+    return False
+
+
+def _donate(engine) -> List[Tuple]:
+    """Entrega o trabalho restante da pilha do engine como tarefas independentes."""
+    tasks = []
+    for top in engine.levels:
+        if top.next_idx < len(top.candidates):
+            tasks.append((top.board_before, top.region_label, top.candidates[top.next_idx:]))
+            top.next_idx = len(top.candidates)
+    tasks.append((engine.board[:], None, None))
+    engine.levels.clear()
+    return tasks
+
+
+def _should_split(engine) -> bool:
+    if engine.nodes_visited < _ctx["node_budget"] or not engine.levels:
+        return False
+    # só divide quando a fila não alimenta todos os workers
+    return _ctx["queued"].value < _ctx["workers"]
+
+
+def _explore(task) -> Dict:
+    board_before, label, candidates = task
+    with _ctx["queued"].get_lock():
+        _ctx["queued"].value -= 1
+
+    options = dict(_ctx["engine_options"])
+    if _ctx["count_all"]:
+        # a tabela de nogoods marcaria subárvores com solução no modo contagem
+        options["nogood_capacity"] = 0
+    engine = LevelEngineRegions(_ctx["width"], _ctx["height"], _ctx["layout"], board_before,
+                                ordering=_ctx["ordering"], **options)
+    result = {"solutions": [], "count": 0, "tasks": []}
+
+    if label is None:
+        status = "start"
+    else:
+        status = "start" if _open_level(engine, board_before, label, candidates) else "unsat"
+
+    while status != "unsat":
+        if _should_split(engine):
+            result["tasks"] = _donate(engine)
+            break
+        status, _ = engine.one_level()
+        if status == "solved":
+            result["count"] += 1
+            result["solutions"].append(engine.board[:])
+            if not _ctx["count_all"]:
+                break
+            # modo contagem: força o retrocesso para seguir com os irmãos
+            status, _ = engine._backtrack([])
+
+    result.update(
+        nodes_visited=engine.nodes_visited,
+        backtracks=engine.backtracks,
+        max_depth=engine.max_depth,
+        nogood_hits=engine.nogood_hits(),
+        nogood_mem_bytes=engine.nogood_memory(),
+        deterministic_counter=dict(engine.deterministic_counter),
+    )
+    return result
+
+
+def _initial_split(engine, split_depth, count_all) -> Tuple[List[Tuple], List[List[int]]]:
+    """Expande os primeiros níveis no processo principal e devolve as tarefas."""
+    roots = [engine.board[:]]
+    solutions = []
+    tasks: List[Tuple] = []
+    for depth in range(split_depth):
+        tasks = []
+        for board in roots:
+            label, region_map = engine.select_region(board)
+            if label is None or any(not c for l, c in region_map.items()):
+                continue
+            tasks.append((board, label, region_map[label]))
+        if depth == split_depth - 1:
+            break
+        roots = []
+        for board_before, label, candidates in tasks:
+            for assignment in candidates:
+                engine.nodes_visited += 1
+                ok, _, new_board, fully, _ = engine._commit_region(board_before, label, assignment)
+                if not ok:
+                    continue
+                if fully:
+                    solutions.append(new_board)
+                    if not count_all:
+                        return [], solutions
+                else:
+                    roots.append(new_board)
+    return tasks, solutions
+
+
+def solve_parallel(width, height, layout, givens, workers: Optional[int] = None,
+                   split_depth: int = 1, count_all: bool = False, node_budget: int = 200,
+                   ordering: str = 'lex', **engine_options) -> Dict:
+    """
+    Resolve um único puzzle dividindo as permutações irmãs dos primeiros
+    `split_depth` níveis entre processos. Em modo normal a primeira solução
+    encontrada cancela os demais workers; com `count_all=True` todas as
+    subárvores são exploradas e as soluções somadas.
+
+    `engine_options` vai para o LevelEngineRegions do processo principal e
+    dos workers (alldiff, subset_rules, arc_consistency, seed, ...).
+    Reinícios não se aplicam: um worker explora só uma subárvore e voltar à
+    raiz dela repetiria as tarefas dos outros.
+    """
+    if engine_options.get("restart_schedule") is not None:
+        raise ValueError("restart_schedule não é suportado na busca paralela")
+    workers = workers or mp.cpu_count()
+    engine = LevelEngineRegions(width, height, layout, givens, ordering=ordering, **engine_options)
+    engine.apply_rules()
+
+    stats = {
+        "board": engine.board[:],
+        "solved": False,
+        "solutions": 0,
+        "nodes_visited": 0,
+        "backtracks": 0,
+        "max_depth": 0,
+        "nogood_hits": 0,
+        "nogood_mem_bytes": 0,
+        "tasks": 0,
+        "splits": 0,
+        "deterministic_counter": dict(engine.deterministic_counter),
+    }
+    if engine.is_complete_and_valid(engine.board):
+        stats.update(solved=True, solutions=1)
+        return stats
+
+    tasks, solutions = _initial_split(engine, split_depth, count_all)
+    stats["nodes_visited"] = engine.nodes_visited
+    if solutions:
+        stats.update(board=solutions[0], solved=True, solutions=len(solutions))
+        if not count_all:
+            return stats
+
+    queued = mp.Value("i", 0)
+    results: "queue.Queue[Dict]" = queue.Queue()
+    pool = mp.Pool(workers, initializer=_init_worker,
+                   initargs=(width, height, layout, ordering, count_all, node_budget, queued, workers,
+                             engine_options))
+
+    def submit(task):
+        with queued.get_lock():
+            queued.value += 1
+        stats["tasks"] += 1
+        pool.apply_async(_explore, (task,), callback=results.put,
+                         error_callback=lambda e: results.put({"error": e}))
+
+    try:
+        pending = 0
+        for task in tasks:
+            submit(task)
+            pending += 1
+        while pending:
+            res = results.get()
+            pending -= 1
+            if "error" in res:
+                raise res["error"]
+            stats["nodes_visited"] += res["nodes_visited"]
+            stats["backtracks"] += res["backtracks"]
+            stats["max_depth"] = max(stats["max_depth"], res["max_depth"])
+            stats["nogood_hits"] += res["nogood_hits"]
+            stats["nogood_mem_bytes"] = max(stats["nogood_mem_bytes"], res["nogood_mem_bytes"])
+            for regra, count in res["deterministic_counter"].items():
+                stats["deterministic_counter"][regra] += count
+            if res["solutions"]:
+                if not stats["solved"]:
+                    stats["board"] = res["solutions"][0]
+                stats["solved"] = True
+                stats["solutions"] += res["count"]
+                if not count_all:
+                    break
+            if res["tasks"]:
+                stats["splits"] += 1
+                for task in res["tasks"]:
+                    submit(task)
+                    pending += 1
+    finally:
+        # cancela as subárvores restantes (primeira solução já encontrada)
+        pool.terminate()
+        pool.join()
+    return stats
@@ -1,15 +1,72 @@
+import random
+import sys
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from motor_deterministico import *
+from ordenacao import ORDERINGS, order_candidates
+from tabela_nogood import ZobristHasher, NogoodTable
+from consistencia_arco import RegionArcConsistency
+from permutacoes import PackedPerms, filter_permutations, pack_permutations
+from eventos import Ev, SOLVED_EVENT, UNSAT_EVENT, UNSAT_STATE_EVENT
+from reinicios import make_policy
 
 
-@dataclass
+# slots: um nível por região aberta, e a pilha chega a milhares de níveis nos
+# tabuleiros grandes (escala.py); as permutações ficam empacotadas em bytes
+@dataclass(slots=True)
 class RegionLevelState:
     board_before: List[Optional[int]]
     region_label: str
-    candidates: List[List[int]]
+    candidates: PackedPerms
     next_idx: int
     value_fixed: Optional[List[int]] = None
+    # estado após o commit e domínios de região que sobreviveram ao AC-3
+    board_after: Optional[List[Optional[int]]] = None
+    domains: Optional[Dict[str, List[List[int]]]] = None
+    # o estado após o commit já falhou; irmãos a partir de next_idx pendentes
+    failed: bool = False
+
+
+class _StepBudget:
+    """Conta permutações testadas para level_steps ceder a cada `max_nodes`."""
+
+    def __init__(self, max_nodes: Optional[int]):
+        self.max_nodes = max_nodes
+        self.count = 0
+        self.sent = 0
+
+    def tick(self) -> bool:
+        self.count += 1
+        return bool(self.max_nodes) and self.count % self.max_nodes == 0
+
+    def pending(self, events) -> List[Dict]:
+        # eventos ainda não entregues em passos anteriores
+        out = events[self.sent:]
+        self.sent = len(events)
+        return out
+
+    def progress(self, engine, events) -> Dict:
+        return {"level": len(engine.levels), "nodes_visited": engine.nodes_visited,
+                "events": self.pending(events)}
+
+
+# tamanho da tabela de nogoods quando ela é ligada automaticamente
+DEFAULT_NOGOOD_CAPACITY = 50_000
+
+
+def _perm_list_bytes(perms) -> int:
+    if isinstance(perms, PackedPerms):
+        return perms.memory_bytes()
+    # todas as permutações de uma região têm o mesmo tamanho
+    return sys.getsizeof(perms) + (len(perms) * sys.getsizeof(perms[0]) if perms else 0)
+
+
+def _run_to_end(steps):
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
 
 
 class LevelEngineRegions:
@@ -18,37 +75,91 @@ class LevelEngineRegions:
     inteiras de uma região por vez. Cada nível considera todos os candidatos
     de uma região (ordem determinada por heurística MRV de regiões), aplica o
     motor determinístico e retrocede caso nenhum candidato sirva.
+
+    `ordering` escolhe a ordem em que as permutações da região MRV são
+    tentadas ("lex", "lcv" ou "stats", ver ordenacao.py).
+
+    `nogood_capacity` limita a tabela de estados já provados contraditórios
+    (hash Zobrist, despejo LRU); 0 desliga a tabela. Na busca em
+    profundidade pura ela nunca acerta: irmãos diferem na região fixada e
+    nenhum estado se repete. Só há acertos quando a busca é refeita no mesmo
+    layout (reinícios, reset com `keep_nogoods`), então o padrão (None) liga
+    a tabela só nesses casos e poupa os dois hashes do tabuleiro por commit.
+
+    `alldiff` liga o propagador all-different por região no motor
+    determinístico e `subset_rules=False` desliga as regras de pares/triplas.
+
+    `arc_consistency` filtra, após cada commit, as permutações de cada região
+    contra as das regiões vizinhas (AC-3, ver consistencia_arco.py); os
+    domínios resultantes ficam guardados no nível e são reaproveitados; os
+    irmãos de um nível que falhou partem dos domínios do nível abaixo (ou da
+    raiz), já que o topo `failed` continua na pilha durante o retrocesso.
+
+    `active_regions` restringe a busca a um subconjunto de regiões (um
+    componente independente, ver componentes.py).
+
+    `seed` sorteia os empates do MRV e a ordem das permutações; com
+    `restart_schedule` ("luby" ou "geometric") a busca volta à raiz quando os
+    retrocessos da rodada passam do limite da agenda (ver reinicios.py).
     """
 
-    def __init__(self, width, height, layout, givens):
+    def __init__(self, width, height, layout, givens, ordering='lex', value_stats=None,
+                 nogood_capacity=None, alldiff=False, subset_rules=True,
+                 arc_consistency=False, active_regions=None,
+                 seed=None, restart_schedule=None, restart_base=32, restart_factor=1.5):
+        if ordering not in ORDERINGS:
+            raise ValueError(f"ordenação desconhecida: {ordering}")
+        self.ordering = ordering
+        self.value_stats = value_stats
+        if restart_schedule is not None and seed is None:
+            seed = 0  # reiniciar sem sortear repetiria a mesma busca
+        self.seed = seed
+        self._restart_args = (restart_schedule, restart_base, restart_factor)
+        self.nogood_capacity = nogood_capacity
+        self.det_schedule = build_schedule(alldiff=alldiff, subset_rules=subset_rules)
         self.w, self.h = width, height
         self.N = width * height
         self.layout = layout
+        # rótulos são letras ou ids numéricos (formato estendido, ver puzzles.py)
+        self.regions, self.neigh = board_topology(width, height, layout)
+
+        self.zobrist = ZobristHasher(self.N, max(len(c) for c in self.regions.values()))
+        self.active_regions = set(active_regions) if active_regions is not None else None
+        self.arc = RegionArcConsistency(self) if arc_consistency else None
+        self.reset(givens)
+
+    def reset(self, givens, keep_nogoods=False):
+        """
+        Recomeça a busca com outras dicas no mesmo layout. A topologia
+        (regiões, vizinhos, Zobrist, pares do AC-3) é mantida; estado da busca,
+        contadores e tabela de nogoods são refeitos. Um nogood é um tabuleiro
+        parcial sem completamento no layout, independente das dicas que o
+        geraram: `keep_nogoods=True` mantém a tabela entre buscas no mesmo
+        layout (ver gerador.py).
+        """
+        kept = self.nogood if keep_nogoods else None
+        self.rng = random.Random(self.seed) if self.seed is not None else None
+        self.restart_policy = make_policy(*self._restart_args)
+        self.restarts = 0
+        self._root_board = None
+        self._root_det_set: set[int] = set()
+        self._round_backtracks = 0
         self.board = givens[:]
-        self.deterministic_counter = {
-            'assign_from_singletons': 0,
-            'hidden_single': 0,
-            'naked_pairs': 0,
-            'hidden_pairs': 0,
-            'naked_triples': 0,
-            'hidden_triples': 0,
-        }
-        self.regions: Dict[str, List[int]] = {}
-        for i, ch in enumerate(layout):
-            self.regions.setdefault(ch, []).append(i)
-
-        self.neigh: Dict[int, List[int]] = {}
-        for i in range(self.N):
-            r, c = i2rc(i, width)
-            ns = []
-            for dr in (-1, 0, 1):
-                for dc in (-1, 0, 1):
-                    if dr == 0 and dc == 0:
-                        continue
-                    rr, cc = r + dr, c + dc
-                    if 0 <= rr < height and 0 <= cc < width:
-                        ns.append(rc2i(rr, cc, width))
-            self.neigh[i] = ns
+        self.deterministic_counter = {regra: 0 for regra in DETERMINISTIC_RULES}
+        self.rule_stats = {name: {'invocations': 0, 'successes': 0}
+                           for tier in self.det_schedule for name in tier}
+        if kept is not None:
+            self.nogood = kept
+        else:
+            capacity = self.nogood_capacity
+            if capacity is None:
+                reuses_states = keep_nogoods or self._restart_args[0] is not None
+                capacity = DEFAULT_NOGOOD_CAPACITY if reuses_states else 0
+            self.nogood = NogoodTable(capacity) if capacity else None
+        self._root_domains = None
+        self._commit_domains = None
+        # nível novo interrompido no meio (ver level_steps)
+        self._pending_level: Optional[RegionLevelState] = None
 
         self.givens_mask = [v is not None for v in self.board]
         self.det_set: set[int] = set()
@@ -58,6 +169,93 @@ class LevelEngineRegions:
         self.nodes_visited = 0
         self.max_depth = 0
 
+    # ---- edição incremental de dicas ----
+    def edit_givens(self, added: Optional[Dict[int, int]] = None, removed=(),
+                    ring_node_cap: int = 200, max_rings: int = 4) -> Tuple[str, Dict]:
+        """
+        Troca algumas dicas (`added`: casa -> valor, `removed`: casas) e
+        resolve de novo aproveitando a solução atual do motor:
+        - se o tabuleiro resolvido já tem os valores adicionados, ele continua
+          sendo solução (tirar dicas nunca a invalida) e volta sem busca;
+        - senão as regiões das casas editadas são esvaziadas, as demais casas
+          mantêm a solução anterior, e a propagação e a busca (limitada a
+          `ring_node_cap` nós) correm só nessas regiões; sem solução, o
+          conjunto cresce um anel de regiões vizinhas por vez e, depois de
+          `max_rings` anéis, a busca é refeita do zero com as dicas novas.
+        Os nogoods valem para o layout, não para as dicas, e são mantidos.
+        Devolve (status, info) como one_level, com "regions" (regiões
+        refeitas), "rings" e "reused".
+        """
+        added = dict(added or {})
+        removed = tuple(removed)
+        # validado antes de mexer no motor: uma edição inválida não deixa
+        # máscara nem níveis pela metade
+        for idx in (*added, *removed):
+            if not 0 <= idx < self.N:
+                raise ValueError(f"casa fora do tabuleiro: {idx}")
+        for idx, val in added.items():
+            size = len(self.regions[self.layout[idx]])
+            if not 1 <= val <= size:
+                raise ValueError(f"valor {val} fora de 1..{size} na casa {idx}")
+        givens = [v if given else None for v, given in zip(self.board, self.givens_mask)]
+        for idx in removed:
+            givens[idx] = None
+        for idx, val in added.items():
+            givens[idx] = val
+        new_mask = [v is not None for v in givens]
+
+        prior = self.board[:] if self.is_target_solved(self.board) else None
+        if prior is not None and all(prior[idx] == val for idx, val in added.items()):
+            self.givens_mask = new_mask
+            self.det_set = {i for i in self.det_set | set(removed) if not new_mask[i]}
+            self.guess_set = {i for i in self.guess_set if not new_mask[i]}
+            self.levels.clear()
+            self._pending_level = None
+            return "solved", {"new_det": [], "level": 0, "events": [SOLVED_EVENT],
+                              "regions": [], "rings": 0, "reused": True, "nodes_visited": 0}
+
+        affected = {self.layout[idx] for idx in added}
+        nodes = 0
+        ring = 0
+        while prior is not None and ring <= max_rings and len(affected) < len(self.regions):
+            start = prior[:]
+            for label in affected:
+                for idx in self.regions[label]:
+                    start[idx] = givens[idx]
+            status = self._search_from(start, new_mask, ring_node_cap)
+            nodes += self.nodes_visited
+            if status == "solved":
+                return "solved", {"new_det": [], "level": len(self.levels), "events": [SOLVED_EVENT],
+                                  "regions": sorted(affected), "rings": ring, "reused": False,
+                                  "nodes_visited": nodes}
+            # um anel de regiões vizinhas (de rei) das regiões refeitas
+            affected |= {self.layout[n] for label in affected
+                         for idx in self.regions[label] for n in self.neigh[idx]}
+            ring += 1
+
+        status = self._search_from(givens, new_mask, None)
+        nodes += self.nodes_visited
+        return status, {"new_det": [], "level": len(self.levels),
+                        "events": [SOLVED_EVENT if status == "solved" else UNSAT_EVENT],
+                        "regions": sorted(self.regions), "rings": ring, "reused": False,
+                        "nodes_visited": nodes}
+
+    def _search_from(self, board, givens_mask, node_cap: Optional[int]) -> str:
+        # as casas fora das regiões refeitas entram como preenchidas, mas só
+        # as dicas de verdade ficam marcadas em givens_mask
+        self.reset(board, keep_nogoods=True)
+        self.givens_mask = givens_mask
+        self.det_set = {i for i, v in enumerate(board) if v is not None and not givens_mask[i]}
+        if self.has_contradiction(self.board):
+            return "unsat"
+        _, fully = self.apply_rules()
+        status = "solved" if fully else "start"
+        while status not in ("solved", "unsat"):
+            if node_cap is not None and self.nodes_visited > node_cap:
+                return "node_cap"
+            status, _ = self.one_level()
+        return status
+
 
     # ---- verificações básicas ----
     def compute_domains(self, board):
@@ -82,10 +280,11 @@ class LevelEngineRegions:
     # --- botão "Resolver (Regras Det)" ---
     def apply_rules(self) -> Tuple[List[int], bool]:
         before = self.board[:]
-        solver = DeterministicSolver(self.w, self.h, self.layout, self.board)
+        solver = DeterministicSolver(self.w, self.h, self.layout, self.board, schedule=self.det_schedule)
         final, _, _, deterministic_counter = solver.solve()
         for regra in deterministic_counter.keys():
             self.deterministic_counter[regra] += deterministic_counter[regra]
+        self._add_rule_stats(solver.rule_stats)
         self.board = final
         new_idxs = [i for i,(b,a) in enumerate(zip(before, final)) if b is None and a is not None]
         for i in new_idxs:
@@ -94,6 +293,12 @@ class LevelEngineRegions:
         fully = self.is_complete_and_valid(self.board)
         return new_idxs, fully
 
+    def _add_rule_stats(self, rule_stats):
+        for name, stats in rule_stats.items():
+            acc = self.rule_stats.setdefault(name, {'invocations': 0, 'successes': 0})
+            acc['invocations'] += stats['invocations']
+            acc['successes'] += stats['successes']
+
     def violates_constraints(self, board) -> bool:
         for ch, cells in self.regions.items():
             vals = [board[i] for i in cells if board[i] is not None]
@@ -115,6 +320,14 @@ class LevelEngineRegions:
             return False
         return not self.violates_constraints(board)
 
+    def is_target_solved(self, board) -> bool:
+        # com `active_regions` basta completar as regiões do subproblema
+        if self.active_regions is None:
+            return self.is_complete_and_valid(board)
+        if any(board[i] is None for ch in self.active_regions for i in self.regions[ch]):
+            return False
+        return not self.violates_constraints(board)
+
     def has_contradiction(self, board) -> bool:
         if self.violates_constraints(board):
             return True
@@ -128,146 +341,224 @@ class LevelEngineRegions:
     def _region_candidates(self, board, label) -> List[List[int]]:
         cells = self.regions[label]
         size = len(cells)
-        available = set(range(1, size + 1))
-        assigned: Dict[int, int] = {}
+        full = (1 << (size + 1)) - 2   # bits 1..size
+        seen = 0
+        pending = False
+        allowed: List[int] = []
 
-        # aplica valores já definidos
+        # máscara de dígitos permitidos por casa; valores já definidos ficam fixos
         for idx in cells:
             val = board[idx]
             if val is not None:
-                if val in assigned.values() or val not in available:
+                if val > size or seen >> val & 1:
                     return []
-                assigned[idx] = val
-                available.discard(val)
+                seen |= 1 << val
                 for n in self.neigh[idx]:
-                    if n not in cells and board[n] == val:
+                    if self.layout[n] != label and board[n] == val:
                         return []
+                allowed.append(1 << val)
+            else:
+                pending = True
+                mask = full
+                for n in self.neigh[idx]:
+                    nval = board[n]
+                    if nval is not None and self.layout[n] != label:
+                        mask &= ~(1 << nval)
+                allowed.append(mask)
 
-        pending = [idx for idx in cells if idx not in assigned]
         if not pending:
             # região completa não precisa de candidatos
             return []
+        return filter_permutations(size, allowed)
+
+    def region_domains(self, board) -> Dict[str, List[List[int]]]:
+        # domínios em cache do nível corrente (ou da raiz) quando o tabuleiro
+        # confere; um topo `failed` está testando irmãos a partir do
+        # board_before dele, que é o estado do nível abaixo (ou da raiz)
+        depth = len(self.levels)
+        if depth and self.levels[-1].failed:
+            depth -= 1
+        if self.arc is not None:
+            if depth:
+                top = self.levels[depth - 1]
+                if top.domains is not None and top.board_after == board:
+                    return dict(top.domains)
+            elif self._root_domains is not None and self._root_domains[0] == board:
+                return dict(self._root_domains[1])
 
-        assignments: List[List[int]] = []
-
-        def backtrack(pos: int, used: set[int], partial: Dict[int, int]):
-            if pos == len(pending):
-                merged = []
-                for idx in cells:
-                    if idx in assigned:
-                        merged.append(assigned[idx])
-                    else:
-                        merged.append(partial[idx])
-                assignments.append(merged)
-                return
-            cell = pending[pos]
-            for val in sorted(available - used):
-                conflict = False
-                for n in self.neigh[cell]:
-                    if n not in cells:
-                        nval = board[n]
-                        if nval is not None and nval == val:
-                            conflict = True
-                            break
-                if conflict:
-                    continue
-                partial[cell] = val
-                used.add(val)
-                backtrack(pos + 1, used, partial)
-                used.remove(val)
-                del partial[cell]
-
-        backtrack(0, set(), {})
-        return assignments
-
-    def select_region(self, board) -> Tuple[Optional[str], Dict[str, List[List[int]]]]:
         region_candidates: Dict[str, List[List[int]]] = {}
         for ch, cells in self.regions.items():
+            if self.active_regions is not None and ch not in self.active_regions:
+                continue
             if any(board[i] is None for i in cells):
                 cands = self._region_candidates(board, ch)
                 region_candidates[ch] = cands
+        if self.arc is not None:
+            # um domínio vazio (sem suporte) vira contradição no one_level
+            self.arc.ac3(region_candidates)
+            if not depth:
+                self._root_domains = (board[:], dict(region_candidates))
+        return region_candidates
+
+    def select_region(self, board) -> Tuple[Optional[str], Dict[str, List[List[int]]]]:
+        region_candidates = self.region_domains(board)
         selectable = [(label, cands) for label, cands in region_candidates.items() if cands]
         if not selectable:
             return None, region_candidates
-        best_label, best_cands = min(selectable, key=lambda item: len(item[1]))
+        if self.rng is None:
+            best_label, best_cands = min(selectable, key=lambda item: len(item[1]))
+        else:
+            fewest = min(len(cands) for _, cands in selectable)
+            best_label, best_cands = self.rng.choice([item for item in selectable if len(item[1]) == fewest])
+            best_cands = best_cands[:]
+            # embaralha antes da ordenação (estável) da heurística: desempate aleatório
+            self.rng.shuffle(best_cands)
+        region_candidates[best_label] = order_candidates(self, board, best_label, best_cands)
         return best_label, region_candidates
 
     # ---- commit / ciclo de nível ----
-    def _commit_region(self, base_board, label, assignment) -> Tuple[bool, List[int], List[Optional[int]], bool, Dict]:
+    def _commit_region(self, base_board, label, assignment) -> Tuple[bool, List[int], List[Optional[int]], bool, Tuple]:
         cells = self.regions[label]
         test_board = base_board[:]
         for idx, val in zip(cells, assignment):
             test_board[idx] = val
         if self.violates_constraints(test_board):
-            return False, [], base_board, False, {
-                "type": "contradiction_region",
-                "region": label,
-                "assignment": assignment,
-                "reason": "immediate_violation",
-            }
+            return False, [], base_board, False, (Ev.CONTRADICTION_REGION, label, assignment, "immediate_violation")
+
+        test_hash = self.zobrist.hash(test_board) if self.nogood is not None else None
+        if test_hash is not None and test_hash in self.nogood:
+            return False, [], base_board, False, (Ev.CONTRADICTION_REGION, label, assignment, "nogood")
 
-        solver = DeterministicSolver(self.w, self.h, self.layout, test_board)
+        solver = DeterministicSolver(self.w, self.h, self.layout, test_board, schedule=self.det_schedule)
         new_board, _, _, deterministic_counter = solver.solve()
         for regra, count in deterministic_counter.items():
             self.deterministic_counter[regra] += count
+        self._add_rule_stats(solver.rule_stats)
+
+        new_hash = self.zobrist.hash(new_board) if self.nogood is not None else None
+        if new_hash is not None and new_hash in self.nogood:
+            self.nogood.add(test_hash)
+            return False, [], base_board, False, (Ev.CONTRADICTION_REGION, label, assignment, "nogood")
 
         if self.has_contradiction(new_board):
-            return False, [], base_board, False, {
-                "type": "contradiction_region",
-                "region": label,
-                "assignment": assignment,
-                "reason": "after_rules",
-            }
+            if self.nogood is not None:
+                self.nogood.add(test_hash)
+                self.nogood.add(new_hash)
+            return False, [], base_board, False, (Ev.CONTRADICTION_REGION, label, assignment, "after_rules")
+
+        self._commit_domains = None
+        if self.arc is not None:
+            domains = self.arc.filter_domains(new_board, self.region_domains(base_board))
+            if not self.arc.ac3(domains):
+                if self.nogood is not None:
+                    self.nogood.add(new_hash)
+                return False, [], base_board, False, (Ev.CONTRADICTION_REGION, label, assignment, "arc_consistency")
+            self._commit_domains = domains
 
         cell_set = set(cells)
         det_new = [
             i for i, (b, a) in enumerate(zip(base_board, new_board))
             if b is None and a is not None and i not in cell_set
         ]
-        fully = self.is_complete_and_valid(new_board)
-        return True, det_new, new_board, fully, {
-            "type": "commit_region",
-            "region": label,
-            "assignment": assignment,
-        }
+        fully = self.is_target_solved(new_board)
+        return True, det_new, new_board, fully, (Ev.COMMIT_REGION, label, assignment)
+
+    def restart(self) -> List[int]:
+        """Volta ao tabuleiro da raiz mantendo contadores e tabela de nogoods."""
+        prev_board = self.board
+        self.board = self._root_board[:]
+        self.levels.clear()
+        self.det_set = set(self._root_det_set)
+        self.guess_set.clear()
+        self.restarts += 1
+        self._round_backtracks = self.backtracks
+        self.restart_policy.next_round()
+        return [i for i, (a, b) in enumerate(zip(prev_board, self.board)) if a != b]
 
     def one_level(self) -> Tuple[str, Dict]:
-        if self.is_complete_and_valid(self.board):
-            return "solved", {"new_det": [], "level": len(self.levels), "events": [{"type": "solved"}]}
-
-        base_board = self.board[:]
-        
-        region_label, region_map = self.select_region(base_board)
+        return _run_to_end(self.level_steps(None))
+
+    def level_steps(self, max_nodes: Optional[int] = 64):
+        """
+        Versão cooperativa de one_level: gerador que cede ("running", info) a
+        cada `max_nodes` permutações testadas e devolve (StopIteration.value)
+        o mesmo (status, info) de one_level. Os "events" de cada passo trazem
+        só os eventos novos, como tuplas de eventos.py. Fechar o gerador no
+        meio deixa o motor retomável: um nível novo interrompido fica guardado
+        (level_in_progress) e um retrocesso fica no topo da pilha marcado
+        `failed`; o próximo one_level/level_steps continua da permutação
+        seguinte à última testada, sem repetir nós. Só se cede depois de
+        testar uma permutação, então mesmo `max_nodes=1` sempre avança.
+        """
+        if self.is_target_solved(self.board):
+            return "solved", {"new_det": [], "level": len(self.levels), "events": [SOLVED_EVENT]}
+
+        budget = _StepBudget(max_nodes)
         events = []
+        pending, self._pending_level = self._pending_level, None
+        if pending is not None and pending.board_before != self.board:
+            pending = None  # o tabuleiro mudou (ex.: regras aplicadas à mão): refaz o nível
+
+        if pending is not None:
+            # retomada de um nível novo interrompido entre duas permutações
+            base_board = pending.board_before
+            region_label = pending.region_label
+            cand_list = pending.candidates
+            start = pending.next_idx
+        else:
+            if self.levels and self.levels[-1].failed:
+                # retomada de um retrocesso interrompido (antes do teste de
+                # reinício, que one_level só faz entre níveis)
+                return (yield from self._backtrack_steps(events, budget))
+
+            if not self.levels:
+                self._root_board = self.board[:]
+                self._root_det_set = set(self.det_set)
+                self._round_backtracks = self.backtracks
+            elif (self.restart_policy is not None
+                  and self.backtracks - self._round_backtracks >= self.restart_policy.limit()):
+                events.append((Ev.RESTART, self.restarts + 1, self.restart()))
+
+            base_board = self.board[:]
+
+            region_label, region_map = self.select_region(base_board)
+
+            # contradição imediata se alguma região obrigatória sem candidatos
+            zero_cands = [label for label, cands in region_map.items() if not cands and any(base_board[i] is None for i in self.regions[label])]
+            if zero_cands:
+                events.append((Ev.NO_REGION_CANDIDATE, zero_cands))
+                self._record_nogood(base_board)
+                return (yield from self._backtrack_steps(events, budget))
+
+            if region_label is None:
+                # não há regiões com lacunas: ou resolvido ou insatisfatível
+                if self.is_target_solved(self.board):
+                    return "solved", {"new_det": [], "level": len(self.levels), "events": [SOLVED_EVENT]}
+                self._record_nogood(base_board)
+                return (yield from self._backtrack_steps([UNSAT_STATE_EVENT], budget))
+
+            cand_list = region_map[region_label]
+            start = 0
+            events.append((Ev.REGION_MRV, region_label, len(cand_list), self.regions[region_label]))
 
-        # contradição imediata se alguma região obrigatória sem candidatos
-        zero_cands = [label for label, cands in region_map.items() if not cands and any(base_board[i] is None for i in self.regions[label])]
-        if zero_cands:
-            events.append({"type": "no_region_candidate", "regions": zero_cands})
-            return self._backtrack(events)
-
-        if region_label is None:
-            # não há regiões com lacunas: ou resolvido ou insatisfatível
-            if self.is_complete_and_valid(self.board):
-                return "solved", {"new_det": [], "level": len(self.levels), "events": [{"type": "solved"}]}
-            return self._backtrack([{"type": "unsat_state"}])
-
-        cand_list = region_map[region_label]
         total_bros = len(cand_list)
-        events.append({
-            "type": "region_mrv",
-            "region": region_label,
-            "candidate_count": total_bros,
-            "cells": self.regions[region_label],
-        })
-
-        for k, assignment in enumerate(cand_list):
+        for k in range(start, total_bros):
+            assignment = cand_list[k]
             self.nodes_visited += 1
             self.max_depth = max(self.max_depth, len(self.levels) + 1)
 
             ok, det_new, new_board, fully, ev = self._commit_region(base_board, region_label, assignment)
             if not ok:
                 events.append(ev)
+                if k + 1 < total_bros and budget.tick():
+                    # o nível fica no motor enquanto o passo está cedido
+                    if pending is None:
+                        pending = RegionLevelState(board_before=base_board, region_label=region_label,
+                                                   candidates=pack_permutations(cand_list), next_idx=k + 1)
+                    pending.next_idx = k + 1
+                    self._pending_level = pending
+                    yield "running", budget.progress(self, events)
+                    self._pending_level = None
                 continue
 
             self.board = new_board
@@ -281,12 +572,14 @@ class LevelEngineRegions:
             self.levels.append(RegionLevelState(
                 board_before=base_board,
                 region_label=region_label,
-                candidates=cand_list,
+                candidates=pending.candidates if pending is not None else PackedPerms(cand_list),
                 next_idx=k + 1,
                 value_fixed=assignment[:],
+                board_after=new_board,
+                domains=self._commit_domains,
             ))
             if det_new:
-                events.append({"type": "det_fills", "count": len(det_new), "indices": det_new})
+                events.append((Ev.DET_FILLS, len(det_new), det_new))
             return "level_committed", {
                 "region": region_label,
                 "new_det": det_new,
@@ -294,39 +587,91 @@ class LevelEngineRegions:
                 "assignment": assignment,
                 "brother_pos": (k + 1, total_bros),
                 "fully": fully,
-                "events": events + [ev],
+                "events": budget.pending(events + [ev]),
             }
 
-        return self._backtrack(events)
+        self._record_nogood(base_board)
+        return (yield from self._backtrack_steps(events, budget))
+
+    def level_in_progress(self) -> bool:
+        """Há um nível interrompido no meio (level_steps fechado antes de terminar)."""
+        return self._pending_level is not None or bool(self.levels and self.levels[-1].failed)
+
+    async def solve_async(self, max_nodes: int = 64, deadline: Optional[float] = None,
+                          on_step=None) -> Tuple[str, Dict]:
+        """
+        Resolve até o fim cedendo o laço de eventos a cada `max_nodes`
+        permutações testadas. `deadline` (time.perf_counter) devolve
+        "timeout"; cancelar a tarefa interrompe a busca entre dois passos.
+        `on_step(status, info)` recebe cada passo e cada nível concluído.
+        """
+        import asyncio
+        import time
+
+        self.apply_rules()
+        status, info = "start", {}
+        while status not in ("solved", "unsat"):
+            steps = self.level_steps(max_nodes)
+            try:
+                while True:
+                    if (deadline is not None and time.perf_counter() > deadline
+                            and not self.is_target_solved(self.board)):
+                        return "timeout", {"level": len(self.levels), "events": []}
+                    try:
+                        status, info = next(steps)
+                    except StopIteration as stop:
+                        status, info = stop.value
+                        break
+                    if on_step is not None:
+                        on_step(status, info)
+                    await asyncio.sleep(0)
+            finally:
+                steps.close()
+            if on_step is not None:
+                on_step(status, info)
+            await asyncio.sleep(0)
+        return status, info
+
+    def _record_nogood(self, board):
+        if self.nogood is not None:
+            self.nogood.add(self.zobrist.hash(board))
 
     def _backtrack(self, events) -> Tuple[str, Dict]:
+        return _run_to_end(self._backtrack_steps(events, _StepBudget(None)))
+
+    def _backtrack_steps(self, events, budget):
+        # o nível do topo fica na pilha marcado `failed` enquanto os irmãos são
+        # testados, para que uma interrupção possa ser retomada
+        reverted: List[int] = []
         while self.levels:
-            self.max_depth = max(self.max_depth, len(self.levels))
-            top = self.levels.pop()
-            prev_board = self.board[:]
-            self.backtracks += 1
-            self.board = top.board_before[:]
-
-            reverted = [i for i, (a, b) in enumerate(zip(prev_board, self.board)) if a != b]
-            for idx in reverted:
-                if idx in self.det_set and not self.givens_mask[idx]:
-                    self.det_set.discard(idx)
-            for idx in self.regions[top.region_label]:
-                if idx in self.guess_set:
-                    self.guess_set.discard(idx)
-
-            events.append({
-                "type": "rollback_region",
-                "region": top.region_label,
-                "reverted": reverted,
-            })
+            top = self.levels[-1]
+            if not top.failed:
+                self.max_depth = max(self.max_depth, len(self.levels))
+                prev_board = self.board[:]
+                self.backtracks += 1
+                self.board = top.board_before[:]
+
+                reverted = [i for i, (a, b) in enumerate(zip(prev_board, self.board)) if a != b]
+                for idx in reverted:
+                    if idx in self.det_set and not self.givens_mask[idx]:
+                        self.det_set.discard(idx)
+                for idx in self.regions[top.region_label]:
+                    if idx in self.guess_set:
+                        self.guess_set.discard(idx)
+
+                events.append((Ev.ROLLBACK_REGION, top.region_label, reverted))
+                top.failed = True
 
             j = len(top.candidates)
-            for k in range(top.next_idx, j):
+            while top.next_idx < j:
+                k = top.next_idx
+                top.next_idx = k + 1
                 assignment = top.candidates[k]
                 ok, det_new2, new_board2, fully2, ev2 = self._commit_region(top.board_before, top.region_label, assignment)
                 if not ok:
                     events.append(ev2)
+                    if top.next_idx < j and budget.tick():
+                        yield "running", budget.progress(self, events)
                     continue
 
                 self.board = new_board2
@@ -337,15 +682,13 @@ class LevelEngineRegions:
                     if not self.givens_mask[idx]:
                         self.guess_set.add(idx)
 
-                self.levels.append(RegionLevelState(
-                    board_before=top.board_before,
-                    region_label=top.region_label,
-                    candidates=top.candidates,
-                    next_idx=k + 1,
-                    value_fixed=assignment[:],
-                ))
+                # o irmão aceito reaproveita o nível do topo
+                top.value_fixed = assignment
+                top.board_after = new_board2
+                top.domains = self._commit_domains
+                top.failed = False
                 if det_new2:
-                    events.append({"type": "det_fills", "count": len(det_new2), "indices": det_new2})
+                    events.append((Ev.DET_FILLS, len(det_new2), det_new2))
                 return "level_committed", {
                     "region": top.region_label,
                     "new_det": det_new2,
@@ -354,11 +697,15 @@ class LevelEngineRegions:
                     "brother_pos": (k + 1, j),
                     "fully": fully2,
                     "reverted": reverted,
-                    "events": events + [ev2],
+                    "events": budget.pending(events + [ev2]),
                 }
 
-        events.append({"type": "unsat"})
-        return "unsat", {"region": None, "new_det": [], "level": 0, "events": events}
+            # todas as permutações do nível falharam: o estado de origem também
+            self.levels.pop()
+            self._record_nogood(top.board_before)
+
+        events.append(UNSAT_EVENT)
+        return "unsat", {"region": None, "new_det": [], "level": 0, "events": budget.pending(events)}
 
     # ---- métricas ----
     def det_count(self) -> int:
@@ -372,3 +719,32 @@ class LevelEngineRegions:
 
     def filled_total(self) -> int:
         return sum(1 for v in self.board if v is not None)
+
+    def nogood_hits(self) -> int:
+        return self.nogood.hits if self.nogood is not None else 0
+
+    def nogood_memory(self) -> int:
+        return self.nogood.memory_bytes() if self.nogood is not None else 0
+
+    def level_stack_memory(self) -> int:
+        """
+        Bytes aproximados da pilha de níveis sem as listas de candidatos:
+        tabuleiros antes/depois do commit, permutação fixada e domínios do
+        AC-3. Os valores são ints pequenos/None compartilhados, então conta
+        só o vetor de ponteiros de cada lista.
+        """
+        total = sys.getsizeof(self.levels)
+        for level in self.levels:
+            total += sys.getsizeof(level) + sys.getsizeof(level.board_before)
+            if level.board_after is not None:
+                total += sys.getsizeof(level.board_after)
+            if level.value_fixed is not None:
+                total += sys.getsizeof(level.value_fixed)
+            if level.domains is not None:
+                total += sys.getsizeof(level.domains)
+                total += sum(_perm_list_bytes(perms) for perms in level.domains.values())
+        return total
+
+    def candidate_memory(self) -> int:
+        """Bytes aproximados das listas de permutações candidatas guardadas nos níveis."""
+        return sum(_perm_list_bytes(level.candidates) for level in self.levels)
@@ -0,0 +1,66 @@
+import random
+import sys
+from collections import OrderedDict
+from typing import List, Optional
+
+
+# =========================
+# Tabela de estados sabidamente contraditórios (nogoods)
+# =========================
+#
+# O estado do tabuleiro determina sozinho o subproblema restante, então
+# basta guardar o hash Zobrist dos estados que já falharam para não reprovar
+# a mesma contradição. Numa única busca em profundidade os estados não se
+# repetem (irmãos diferem na região fixada); eles voltam quando a busca é
+# refeita no mesmo layout: reinícios (reinicios.py) e as buscas sucessivas
+# do gerador e da edição de dicas (LevelEngineRegions.reset com
+# keep_nogoods). Só nesses casos o LevelEngineRegions liga a tabela.
+
+
+class ZobristHasher:
+    def __init__(self, n_cells: int, max_value: int, seed: int = 208):
+        rng = random.Random(seed)
+        self.keys = [[rng.getrandbits(64) for _ in range(max_value + 1)] for _ in range(n_cells)]
+
+    def hash(self, board: List[Optional[int]]) -> int:
+        h = 0
+        keys = self.keys
+        for i, v in enumerate(board):
+            if v is not None:
+                h ^= keys[i][v]
+        return h
+
+
+class NogoodTable:
+    """Conjunto limitado de hashes de estados que falharam, com despejo LRU."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._table: "OrderedDict[int, None]" = OrderedDict()
+        self.hits = 0
+        self.inserts = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, h: int) -> bool:
+        if h in self._table:
+            self._table.move_to_end(h)
+            self.hits += 1
+            return True
+        return False
+
+    def add(self, h: int):
+        if h in self._table:
+            self._table.move_to_end(h)
+            return
+        self._table[h] = None
+        self.inserts += 1
+        if len(self._table) > self.capacity:
+            self._table.popitem(last=False)
+            self.evictions += 1
+
+    def memory_bytes(self) -> int:
+        # estrutura do OrderedDict + um int de 64 bits por entrada
+        return sys.getsizeof(self._table) + len(self._table) * sys.getsizeof(1 << 63)
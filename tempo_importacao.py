@@ -0,0 +1,76 @@
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+# =========================
+# Benchmark de tempo de importação
+# =========================
+#
+# Roda `python -X importtime -c "import <módulo>"` num processo novo para
+# cada ponto de entrada sem interface e soma o tempo cumulativo. O núcleo
+# (leitura, motores, CLI e o runner do benchmark) não pode carregar pandas,
+# numpy nem tkinter na importação: relatórios e GUI importam esses pacotes
+# só quando são usados.
+
+CORE_MODULES = (
+    "puzzles",
+    "motor_deterministico",
+    "solver_regiao",
+    "solver_paralelo",
+    "componentes",
+    "cli",
+    "dificuldade",
+    "escala",
+    "main_solver2",
+)
+HEAVY_MODULES = ("pandas", "numpy", "tkinter")
+# limite (ms) do tempo cumulativo de importação de cada módulo do núcleo
+DEFAULT_BUDGET_MS = 250.0
+
+
+def import_profile(module: str, runs: int = 3) -> Tuple[float, List[str]]:
+    """Menor tempo cumulativo (ms) entre `runs` execuções e os pacotes pesados carregados."""
+    best = None
+    heavy: List[str] = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True, check=True)
+        total = None
+        loaded = set()
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            fields = [f.strip() for f in line[len("import time:"):].split("|")]
+            if not fields[1].isdigit():
+                continue  # cabeçalho
+            name = fields[2].strip()
+            loaded.add(name.split(".")[0])
+            if name == module:
+                total = int(fields[1]) / 1000.0
+        heavy = sorted(loaded.intersection(HEAVY_MODULES))
+        if total is not None and (best is None or total < best):
+            best = total
+    return best or 0.0, heavy
+
+
+def run(modules=CORE_MODULES, budget_ms: float = DEFAULT_BUDGET_MS, runs: int = 3) -> Dict[str, Dict]:
+    report = {}
+    for module in modules:
+        ms, heavy = import_profile(module, runs)
+        report[module] = {"ms": ms, "heavy": heavy, "ok": not heavy and ms <= budget_ms}
+        flag = "ok" if report[module]["ok"] else "FALHOU"
+        extra = f"  carrega {', '.join(heavy)}" if heavy else ""
+        print(f"{module:<22} {ms:8.1f} ms  {flag}{extra}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação dos módulos do núcleo")
+    parser.add_argument("modules", nargs="*", default=list(CORE_MODULES))
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    report = run(args.modules, args.budget_ms, args.runs)
+    sys.exit(0 if all(r["ok"] for r in report.values()) else 1)
@@ -0,0 +1,148 @@
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from puzzles import load_puzzles
+
+
+# =========================
+# Verificação em lote das soluções (NumPy)
+# =========================
+#
+# Confere milhares de tabuleiros de uma vez, agrupados por dimensão:
+# - completos: nenhuma casa vazia (0);
+# - vizinhança de rei: o tabuleiro é comparado com ele mesmo deslocado de uma
+#   casa na horizontal, na vertical e nas duas diagonais;
+# - regiões: as casas de todos os tabuleiros são ordenadas por (tabuleiro,
+#   região, valor); numa região de n casas os valores ordenados têm de ser
+#   exatamente 1..n, ou seja, valor == posição na fatia da região + 1;
+# - resposta: igualdade com a coluna `answer` quando ela existe.
+#
+# Não entra na importação do núcleo (tempo_importacao.py): main_solver2 só
+# importa este módulo ao conferir os resultados.
+#
+#   python verificacao.py tabuleiros/*.txt                   # as respostas dos arquivos
+#   python cli.py tabuleiros/SUG_8x8_v12.txt > saida.ndjson
+#   python verificacao.py tabuleiros/SUG_8x8_v12.txt --results saida.ndjson
+
+
+def _region_ids(layout) -> np.ndarray:
+    # letras viram o código do caractere; ids numéricos ficam como estão
+    if isinstance(layout, str):
+        return np.frombuffer(layout.encode("ascii"), dtype=np.uint8).astype(np.int64)
+    return np.asarray(layout, dtype=np.int64)
+
+
+def _board_array(board) -> np.ndarray:
+    return np.fromiter((v or 0 for v in board), dtype=np.int64, count=len(board))
+
+
+def _verify_group(width: int, height: int, layouts, boards, answers) -> Dict[str, np.ndarray]:
+    k = len(boards)
+    b = np.stack([_board_array(board) for board in boards])
+    regions = np.stack([_region_ids(layout) for layout in layouts])
+
+    complete = (b > 0).all(axis=1)
+
+    g = b.reshape(k, height, width)
+    clash = np.zeros(k, dtype=bool)
+    for a, c in ((g[:, :, 1:], g[:, :, :-1]),           # horizontal
+                 (g[:, 1:, :], g[:, :-1, :]),           # vertical
+                 (g[:, 1:, 1:], g[:, :-1, :-1]),        # diagonal principal
+                 (g[:, 1:, :-1], g[:, :-1, 1:])):       # diagonal secundária
+        clash |= ((a == c) & (a > 0)).reshape(k, -1).any(axis=1)
+
+    # fatias por (tabuleiro, região) com os valores ordenados
+    n = width * height
+    owner = np.repeat(np.arange(k), n)
+    keys = owner * (int(regions.max()) + 1) + regions.ravel()
+    vals = b.ravel()
+    order = np.lexsort((vals, keys))
+    sk, sv = keys[order], vals[order]
+    pos = np.arange(k * n)
+    starts = np.ones(k * n, dtype=bool)
+    starts[1:] = sk[1:] != sk[:-1]
+    rank = pos - np.maximum.accumulate(np.where(starts, pos, 0))
+    bad_cells = sv != rank + 1
+    region_ok = np.bincount(owner[order][bad_cells], minlength=k) == 0
+
+    valid = complete & ~clash & region_ok
+    matches = np.zeros(k, dtype=bool)
+    has_answer = np.array([bool(answer) and any(answer) for answer in answers])
+    if has_answer.any():
+        rows = np.flatnonzero(has_answer)
+        a = np.stack([_board_array(answers[i]) for i in rows])
+        matches[rows] = (b[rows] == a).all(axis=1)
+    return {"valid": valid, "complete": complete, "matches_answer": matches, "has_answer": has_answer}
+
+
+def verify_boards(puzzles: Sequence[Dict], boards: Sequence[Sequence[Optional[int]]]) -> List[Dict]:
+    """
+    Confere `boards[i]` como solução de `puzzles[i]` (dicts de puzzles.parse_line).
+    Devolve, na mesma ordem, {"valid", "complete", "matches_answer"};
+    matches_answer é None quando o puzzle não tem resposta.
+    """
+    out: List[Optional[Dict]] = [None] * len(puzzles)
+    groups: Dict[tuple, List[int]] = {}
+    for i, puzzle in enumerate(puzzles):
+        groups.setdefault((puzzle["width"], puzzle["height"]), []).append(i)
+    for (width, height), idxs in groups.items():
+        res = _verify_group(width, height, [puzzles[i]["layout"] for i in idxs],
+                            [boards[i] for i in idxs], [puzzles[i].get("answer") for i in idxs])
+        for j, i in enumerate(idxs):
+            out[i] = {
+                "valid": bool(res["valid"][j]),
+                "complete": bool(res["complete"][j]),
+                "matches_answer": bool(res["matches_answer"][j]) if res["has_answer"][j] else None,
+            }
+    return out
+
+
+def verify_answers(puzzles: Sequence[Dict]) -> List[Dict]:
+    """Confere a própria coluna `answer` de cada puzzle (sanidade dos arquivos)."""
+    return verify_boards(puzzles, [p["answer"] for p in puzzles])
+
+
+def _read_results(path: str) -> Dict[str, List[Optional[int]]]:
+    # registros NDJSON da cli.py: nome -> tabuleiro
+    boards = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if "board" in record:
+                boards[record["name"]] = [int(ch) if ch.isdigit() else None for ch in record["board"]]
+    return boards
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere soluções Suguru em lote")
+    parser.add_argument("files", nargs="+", help="arquivos de puzzles (formato de ./tabuleiros)")
+    parser.add_argument("--results", default=None,
+                        help="NDJSON da cli.py; sem ele, confere as respostas dos arquivos")
+    args = parser.parse_args()
+
+    puzzles = [p for path in args.files for p in load_puzzles(path)]
+    if args.results:
+        found = _read_results(args.results)
+        puzzles = [p for p in puzzles if p["name"] in found]
+        boards = [found[p["name"]] for p in puzzles]
+    else:
+        boards = [p["answer"] for p in puzzles]
+    start = time.perf_counter()
+    checks = verify_boards(puzzles, boards)
+    elapsed = time.perf_counter() - start
+
+    invalid = [p["name"] for p, c in zip(puzzles, checks) if not c["valid"]]
+    mismatch = [p["name"] for p, c in zip(puzzles, checks) if c["matches_answer"] is False]
+    summary = {"total": len(checks), "invalid": len(invalid), "mismatch": len(mismatch),
+               "time": elapsed, "per_second": len(checks) / elapsed if elapsed > 0 else 0.0}
+    for name in invalid[:20]:
+        print(f"inválido: {name}")
+    for name in mismatch[:20]:
+        print(f"difere da resposta: {name}")
+    print(summary, file=sys.stderr)
+    sys.exit(0 if not invalid and not mismatch else 1)